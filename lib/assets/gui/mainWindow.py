@@ -183,11 +183,15 @@ class Ui_SimMainWindow(object):
         self.gridLayout.setObjectName("gridLayout")
         self.le_nsteps = QtWidgets.QLineEdit(self.TAB_options)
         self.le_nsteps.setObjectName("le_nsteps")
-        self.gridLayout.addWidget(self.le_nsteps, 5, 1, 1, 1)
+        self.gridLayout.addWidget(self.le_nsteps, 7, 1, 1, 1)
         self.cmb_solmethod = QtWidgets.QComboBox(self.TAB_options)
         self.cmb_solmethod.setObjectName("cmb_solmethod")
         self.cmb_solmethod.addItem("")
         self.cmb_solmethod.addItem("")
+        self.cmb_solmethod.addItem("")
+        self.cmb_solmethod.addItem("")
+        self.cmb_solmethod.addItem("")
+        self.cmb_solmethod.addItem("")
         self.gridLayout.addWidget(self.cmb_solmethod, 0, 1, 1, 1)
         self.cmb_tsteps = QtWidgets.QComboBox(self.TAB_options)
         self.cmb_tsteps.setObjectName("cmb_tsteps")
@@ -197,7 +201,7 @@ class Ui_SimMainWindow(object):
         self.cmb_tsteps.addItem("")
         self.gridLayout.addWidget(self.cmb_tsteps, 4, 1, 1, 1)
         spacerItem1 = QtWidgets.QSpacerItem(1, 100, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Preferred)
-        self.gridLayout.addItem(spacerItem1, 8, 0, 1, 1)
+        self.gridLayout.addItem(spacerItem1, 12, 0, 1, 1)
         self.le_stepvalue = QtWidgets.QLineEdit(self.TAB_options)
         self.le_stepvalue.setObjectName("le_stepvalue")
         self.gridLayout.addWidget(self.le_stepvalue, 4, 0, 1, 1)
@@ -216,10 +220,43 @@ class Ui_SimMainWindow(object):
         sizePolicy.setHeightForWidth(self.lbl_stepfreq.sizePolicy().hasHeightForWidth())
         self.lbl_stepfreq.setSizePolicy(sizePolicy)
         self.lbl_stepfreq.setObjectName("lbl_stepfreq")
-        self.gridLayout.addWidget(self.lbl_stepfreq, 6, 0, 1, 1)
+        self.gridLayout.addWidget(self.lbl_stepfreq, 8, 0, 1, 1)
         self.le_stepfreq = QtWidgets.QLineEdit(self.TAB_options)
         self.le_stepfreq.setObjectName("le_stepfreq")
-        self.gridLayout.addWidget(self.le_stepfreq, 6, 1, 1, 1)
+        self.gridLayout.addWidget(self.le_stepfreq, 8, 1, 1, 1)
+        self.lbl_theta = QtWidgets.QLabel(self.TAB_options)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lbl_theta.sizePolicy().hasHeightForWidth())
+        self.lbl_theta.setSizePolicy(sizePolicy)
+        self.lbl_theta.setObjectName("lbl_theta")
+        self.gridLayout.addWidget(self.lbl_theta, 2, 0, 1, 1)
+        self.le_theta = QtWidgets.QLineEdit(self.TAB_options)
+        self.le_theta.setObjectName("le_theta")
+        self.gridLayout.addWidget(self.le_theta, 2, 1, 1, 1)
+        self.lbl_rtol = QtWidgets.QLabel(self.TAB_options)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lbl_rtol.sizePolicy().hasHeightForWidth())
+        self.lbl_rtol.setSizePolicy(sizePolicy)
+        self.lbl_rtol.setObjectName("lbl_rtol")
+        self.gridLayout.addWidget(self.lbl_rtol, 5, 0, 1, 1)
+        self.le_rtol = QtWidgets.QLineEdit(self.TAB_options)
+        self.le_rtol.setObjectName("le_rtol")
+        self.gridLayout.addWidget(self.le_rtol, 5, 1, 1, 1)
+        self.lbl_atol = QtWidgets.QLabel(self.TAB_options)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.lbl_atol.sizePolicy().hasHeightForWidth())
+        self.lbl_atol.setSizePolicy(sizePolicy)
+        self.lbl_atol.setObjectName("lbl_atol")
+        self.gridLayout.addWidget(self.lbl_atol, 6, 0, 1, 1)
+        self.le_atol = QtWidgets.QLineEdit(self.TAB_options)
+        self.le_atol.setObjectName("le_atol")
+        self.gridLayout.addWidget(self.le_atol, 6, 1, 1, 1)
         self.lbl_tsteps = QtWidgets.QLabel(self.TAB_options)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
         sizePolicy.setHorizontalStretch(0)
@@ -230,7 +267,7 @@ class Ui_SimMainWindow(object):
         self.gridLayout.addWidget(self.lbl_tsteps, 3, 0, 1, 1)
         self.lbl_solvetime = QtWidgets.QLabel(self.TAB_options)
         self.lbl_solvetime.setObjectName("lbl_solvetime")
-        self.gridLayout.addWidget(self.lbl_solvetime, 7, 0, 1, 1)
+        self.gridLayout.addWidget(self.lbl_solvetime, 9, 0, 1, 1)
         self.cmb_solvetime = QtWidgets.QComboBox(self.TAB_options)
         self.cmb_solvetime.setObjectName("cmb_solvetime")
         self.cmb_solvetime.addItem("")
@@ -242,7 +279,7 @@ class Ui_SimMainWindow(object):
         self.cmb_solvetime.addItem("")
         self.cmb_solvetime.addItem("")
         self.cmb_solvetime.setItemText(7, "")
-        self.gridLayout.addWidget(self.cmb_solvetime, 7, 1, 1, 1)
+        self.gridLayout.addWidget(self.cmb_solvetime, 9, 1, 1, 1)
         self.lbl_simdur = QtWidgets.QLabel(self.TAB_options)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
         sizePolicy.setHorizontalStretch(0)
@@ -250,7 +287,7 @@ class Ui_SimMainWindow(object):
         sizePolicy.setHeightForWidth(self.lbl_simdur.sizePolicy().hasHeightForWidth())
         self.lbl_simdur.setSizePolicy(sizePolicy)
         self.lbl_simdur.setObjectName("lbl_simdur")
-        self.gridLayout.addWidget(self.lbl_simdur, 5, 0, 1, 1)
+        self.gridLayout.addWidget(self.lbl_simdur, 7, 0, 1, 1)
         self.lbl_multiprocess = QtWidgets.QLabel(self.TAB_options)
         self.lbl_multiprocess.setObjectName("lbl_multiprocess")
         self.gridLayout.addWidget(self.lbl_multiprocess, 1, 0, 1, 1)
@@ -258,6 +295,18 @@ class Ui_SimMainWindow(object):
         self.rb_multiprocess.setChecked(False)
         self.rb_multiprocess.setObjectName("rb_multiprocess")
         self.gridLayout.addWidget(self.rb_multiprocess, 1, 1, 1, 1)
+        self.lbl_store = QtWidgets.QLabel(self.TAB_options)
+        self.lbl_store.setObjectName("lbl_store")
+        self.gridLayout.addWidget(self.lbl_store, 10, 0, 1, 1)
+        self.cb_store = QtWidgets.QCheckBox(self.TAB_options)
+        self.cb_store.setObjectName("cb_store")
+        self.gridLayout.addWidget(self.cb_store, 10, 1, 1, 1)
+        self.lbl_numba = QtWidgets.QLabel(self.TAB_options)
+        self.lbl_numba.setObjectName("lbl_numba")
+        self.gridLayout.addWidget(self.lbl_numba, 11, 0, 1, 1)
+        self.cb_numba = QtWidgets.QCheckBox(self.TAB_options)
+        self.cb_numba.setObjectName("cb_numba")
+        self.gridLayout.addWidget(self.cb_numba, 11, 1, 1, 1)
         self.WIDGET_LH.addTab(self.TAB_options, "")
         self.verticalLayout_2.addWidget(self.WIDGET_LH)
         self.frame = QtWidgets.QFrame(self.FRAME_LH)
@@ -302,9 +351,6 @@ class Ui_SimMainWindow(object):
         self.verticalLayout_7 = QtWidgets.QVBoxLayout(self.TAB_system_view)
         self.verticalLayout_7.setContentsMargins(0, 0, 0, 0)
         self.verticalLayout_7.setObjectName("verticalLayout_7")
-        self.gv_system_view = GLViewWidget(self.TAB_system_view)
-        self.gv_system_view.setObjectName("gv_system_view")
-        self.verticalLayout_7.addWidget(self.gv_system_view)
         self.WIDGET_viewTabs.addTab(self.TAB_system_view, "")
         self.TAB_XY = QtWidgets.QWidget()
         self.TAB_XY.setObjectName("TAB_XY")
@@ -325,9 +371,6 @@ class Ui_SimMainWindow(object):
         self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.TAB_3D)
         self.verticalLayout_4.setContentsMargins(0, 0, 0, 0)
         self.verticalLayout_4.setObjectName("verticalLayout_4")
-        self.gv_3d = GLViewWidget(self.TAB_3D)
-        self.gv_3d.setObjectName("gv_3d")
-        self.verticalLayout_4.addWidget(self.gv_3d)
         self.WIDGET_viewTabs.addTab(self.TAB_3D, "")
         self.verticalLayout.addWidget(self.WIDGET_viewTabs)
         self.frame_7 = QtWidgets.QFrame(self.FRAME_views)
@@ -355,13 +398,31 @@ class Ui_SimMainWindow(object):
         self.menuFile.setObjectName("menuFile")
         self.menuHelp = QtWidgets.QMenu(self.menubar)
         self.menuHelp.setObjectName("menuHelp")
+        self.menuProfile = QtWidgets.QMenu(self.menubar)
+        self.menuProfile.setObjectName("menuProfile")
         SimMainWindow.setMenuBar(self.menubar)
         self.actionPreset = QtWidgets.QAction(SimMainWindow)
         self.actionPreset.setObjectName("actionPreset")
+        self.actionOpenRun = QtWidgets.QAction(SimMainWindow)
+        self.actionOpenRun.setObjectName("actionOpenRun")
         self.actionExit = QtWidgets.QAction(SimMainWindow)
         self.actionExit.setObjectName("actionExit")
+        self.actionProfilePhases = QtWidgets.QAction(SimMainWindow)
+        self.actionProfilePhases.setCheckable(True)
+        self.actionProfilePhases.setObjectName("actionProfilePhases")
+        self.actionProfileTrace = QtWidgets.QAction(SimMainWindow)
+        self.actionProfileTrace.setCheckable(True)
+        self.actionProfileTrace.setObjectName("actionProfileTrace")
+        self.actionProfileCProfile = QtWidgets.QAction(SimMainWindow)
+        self.actionProfileCProfile.setCheckable(True)
+        self.actionProfileCProfile.setObjectName("actionProfileCProfile")
+        self.menuFile.addAction(self.actionOpenRun)
         self.menuFile.addAction(self.actionExit)
+        self.menuProfile.addAction(self.actionProfilePhases)
+        self.menuProfile.addAction(self.actionProfileTrace)
+        self.menuProfile.addAction(self.actionProfileCProfile)
         self.menubar.addAction(self.menuFile.menuAction())
+        self.menubar.addAction(self.menuProfile.menuAction())
         self.menubar.addAction(self.menuHelp.menuAction())
 
         self.retranslateUi(SimMainWindow)
@@ -389,6 +450,10 @@ class Ui_SimMainWindow(object):
         self.le_nsteps.setText(_translate("SimMainWindow", "100"))
         self.cmb_solmethod.setItemText(0, _translate("SimMainWindow", "Euler Integration"))
         self.cmb_solmethod.setItemText(1, _translate("SimMainWindow", "Sphere of Influence"))
+        self.cmb_solmethod.setItemText(2, _translate("SimMainWindow", "Runge-Kutta 4"))
+        self.cmb_solmethod.setItemText(3, _translate("SimMainWindow", "Leapfrog (Symplectic)"))
+        self.cmb_solmethod.setItemText(4, _translate("SimMainWindow", "Dormand-Prince 5(4) (Adaptive)"))
+        self.cmb_solmethod.setItemText(5, _translate("SimMainWindow", "Barnes-Hut Tree (Euler)"))
         self.cmb_tsteps.setItemText(0, _translate("SimMainWindow", "Seconds"))
         self.cmb_tsteps.setItemText(1, _translate("SimMainWindow", "Minutes"))
         self.cmb_tsteps.setItemText(2, _translate("SimMainWindow", "Days"))
@@ -398,6 +463,12 @@ class Ui_SimMainWindow(object):
         self.lbl_stepfreq.setText(_translate("SimMainWindow", "Report Frequency:"))
         self.le_stepfreq.setText(_translate("SimMainWindow", "1"))
         self.lbl_tsteps.setText(_translate("SimMainWindow", "Time Step Value:"))
+        self.lbl_theta.setText(_translate("SimMainWindow", "Opening Angle (Tree):"))
+        self.le_theta.setText(_translate("SimMainWindow", "0.5"))
+        self.lbl_rtol.setText(_translate("SimMainWindow", "Relative Tolerance:"))
+        self.le_rtol.setText(_translate("SimMainWindow", "1e-9"))
+        self.lbl_atol.setText(_translate("SimMainWindow", "Absolute Tolerance:"))
+        self.le_atol.setText(_translate("SimMainWindow", "1e-3"))
         self.lbl_solvetime.setText(_translate("SimMainWindow", "Maximum Solve Time (s):"))
         self.cmb_solvetime.setItemText(0, _translate("SimMainWindow", "Unlimited"))
         self.cmb_solvetime.setItemText(1, _translate("SimMainWindow", "5"))
@@ -408,7 +479,12 @@ class Ui_SimMainWindow(object):
         self.cmb_solvetime.setItemText(6, _translate("SimMainWindow", "60"))
         self.lbl_simdur.setText(_translate("SimMainWindow", "Number of Steps:"))
         self.lbl_multiprocess.setText(_translate("SimMainWindow", "Multiprocessing:"))
-        self.rb_multiprocess.setText(_translate("SimMainWindow", "(Currently Unsupported)"))
+        self.rb_multiprocess.setText(_translate("SimMainWindow", "Process pool (all cores)"))
+        self.lbl_store.setText(_translate("SimMainWindow", "Stream To Disk:"))
+        self.cb_store.setText(_translate("SimMainWindow", "(choose file on plot)"))
+        self.lbl_numba.setText(_translate("SimMainWindow", "Compiled Kernels:"))
+        self.cb_numba.setToolTip(_translate("SimMainWindow", "Run Euler, RK4, Leapfrog and Dormand-Prince forces through Numba when it is installed"))
+        self.cb_numba.setText(_translate("SimMainWindow", "(Numba)"))
         self.WIDGET_LH.setTabText(self.WIDGET_LH.indexOf(self.TAB_options), _translate("SimMainWindow", "Options"))
         self.btn_reset.setText(_translate("SimMainWindow", "Reset"))
         self.btn_clear.setText(_translate("SimMainWindow", "Clear Plot"))
@@ -421,8 +497,12 @@ class Ui_SimMainWindow(object):
         self.btn_focus_next.setText(_translate("SimMainWindow", ">>"))
         self.menuFile.setTitle(_translate("SimMainWindow", "File"))
         self.menuHelp.setTitle(_translate("SimMainWindow", "Help"))
+        self.menuProfile.setTitle(_translate("SimMainWindow", "Profile"))
         self.actionPreset.setText(_translate("SimMainWindow", "Preset"))
+        self.actionOpenRun.setText(_translate("SimMainWindow", "Open Run..."))
         self.actionExit.setText(_translate("SimMainWindow", "Exit"))
+        self.actionProfilePhases.setText(_translate("SimMainWindow", "Time Run Phases"))
+        self.actionProfileTrace.setText(_translate("SimMainWindow", "Save Phase Trace..."))
+        self.actionProfileCProfile.setText(_translate("SimMainWindow", "cProfile Next Run..."))
 
 from pyqtgraph import PlotWidget
-from pyqtgraph.opengl import GLViewWidget
@@ -36,8 +36,13 @@ class Ui_starPresetDialog(object):
         self.lbl_starselect = QtWidgets.QLabel(self.frame_4)
         self.lbl_starselect.setObjectName("lbl_starselect")
         self.verticalLayout_2.addWidget(self.lbl_starselect)
+        self.le_search = QtWidgets.QLineEdit(self.frame_4)
+        self.le_search.setClearButtonEnabled(True)
+        self.le_search.setObjectName("le_search")
+        self.verticalLayout_2.addWidget(self.le_search)
         self.lv_stars = QtWidgets.QListView(self.frame_4)
         self.lv_stars.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.lv_stars.setUniformItemSizes(True)
         self.lv_stars.setObjectName("lv_stars")
         self.verticalLayout_2.addWidget(self.lv_stars)
         self.horizontalLayout.addWidget(self.frame_4)
@@ -169,6 +174,7 @@ class Ui_starPresetDialog(object):
         _translate = QtCore.QCoreApplication.translate
         starPresetDialog.setWindowTitle(_translate("starPresetDialog", "Star Selector"))
         self.lbl_starselect.setText(_translate("starPresetDialog", "Select a Star from the Catalog:"))
+        self.le_search.setPlaceholderText(_translate("starPresetDialog", "Search by name or alternate name"))
         self.gb_starinfo.setTitle(_translate("starPresetDialog", "Selected Star:"))
         self.lbl_name.setText(_translate("starPresetDialog", "Name:"))
         self.lbl_altname.setText(_translate("starPresetDialog", "Alternate Names:"))
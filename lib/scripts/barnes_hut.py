@@ -0,0 +1,161 @@
+import numpy as np
+
+from lib.scripts.nbody import G, calcAcceleration, calcStarAcceleration
+
+# Depth of the octree; 16 levels of 3 bits fit comfortably in an int64 key
+DEPTH = 16
+# Targets walked through the tree at once, which bounds the interaction list
+BATCH = 4096
+
+
+class Level:
+
+    def __init__(self, keys, mass, com, count):
+        self.keys = keys
+        self.mass = mass
+        self.com = com
+        self.count = count
+        self.child_start = None
+        self.child_stop = None
+
+class Tree:
+
+    def __init__(self, levels, codes, size):
+        self.levels = levels
+        self.codes = codes
+        self.size = size
+
+
+def mortonCodes(cells):
+
+    codes = np.zeros(len(cells), dtype=np.int64)
+    for bit in range(DEPTH):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> bit) & 1) << (3*bit + axis)
+
+    return codes
+
+def buildTree(pos, mass):
+
+    # Linear octree: bodies sorted by Morton code make every cell a contiguous
+    # run, so cell masses and centres of mass are segment sums at each level
+    n = len(pos)
+    lower = pos.min(axis=0)
+    size = (pos.max(axis=0) - lower).max() * (1 + 1e-9)
+    if size == 0:
+        size = 1.0
+
+    cells = np.clip(((pos - lower) / size * 2**DEPTH).astype(np.int64), 0, 2**DEPTH - 1)
+    codes = mortonCodes(cells)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    sorted_mass = mass[order]
+    sorted_moment = pos[order] * sorted_mass[:, np.newaxis]
+
+    levels = []
+    for level in range(DEPTH + 1):
+        keys = sorted_codes >> (3*(DEPTH - level))
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        node_mass = np.add.reduceat(sorted_mass, starts)
+        node_moment = np.add.reduceat(sorted_moment, starts, axis=0)
+        node_com = node_moment / np.where(node_mass > 0, node_mass, 1)[:, np.newaxis]
+        count = np.diff(np.r_[starts, n])
+        levels.append(Level(keys[starts], node_mass, node_com, count))
+
+    for parent, child in zip(levels[:-1], levels[1:]):
+        child_parents = child.keys >> 3
+        parent.child_start = np.searchsorted(child_parents, parent.keys, 'left')
+        parent.child_stop = np.searchsorted(child_parents, parent.keys, 'right')
+
+    return Tree(levels, codes, size)
+
+def walkTree(tree, pos, mass, targets, theta):
+
+    acc = np.zeros((len(targets), 3))
+    tgt = np.arange(len(targets))
+    node = np.zeros(len(targets), dtype=np.int64)
+    target_pos = pos[targets]
+    target_codes = tree.codes[targets]
+
+    for depth, level in enumerate(tree.levels):
+        if len(tgt) == 0:
+            break
+
+        com = level.com[node]
+        node_mass = level.mass[node]
+        sep = com - target_pos[tgt]
+        dist_sq = np.einsum('ij,ij->i', sep, sep)
+        cell_size = tree.size / 2**depth
+
+        inside = (target_codes[tgt] >> (3*(DEPTH - depth))) == level.keys[node]
+        leaf = (level.count[node] == 1) | (depth == DEPTH)
+        accept = leaf | (~inside & (cell_size**2 < theta**2 * dist_sq))
+
+        # A leaf holding the target acts with the target's own mass removed
+        own = accept & inside
+        if own.any():
+            own_mass = mass[targets[tgt[own]]]
+            rest = node_mass[own] - own_mass
+            moment = com[own] * node_mass[own, np.newaxis] - target_pos[tgt[own]] * own_mass[:, np.newaxis]
+            com[own] = moment / np.where(rest > 0, rest, 1)[:, np.newaxis]
+            node_mass[own] = rest
+            sep[own] = com[own] - target_pos[tgt[own]]
+            dist_sq[own] = np.einsum('ij,ij->i', sep[own], sep[own])
+
+        accepted = accept & (node_mass > 0) & (dist_sq > 0)
+        a_scal = G * node_mass[accepted] * dist_sq[accepted]**-1.5
+        for axis in range(3):
+            acc[:, axis] += np.bincount(tgt[accepted], weights=a_scal * sep[accepted, axis], minlength=len(targets))
+
+        opened = ~accept
+        if depth == DEPTH or not opened.any():
+            break
+        start = level.child_start[node[opened]]
+        count = level.child_stop[node[opened]] - start
+        offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        tgt = np.repeat(tgt[opened], count)
+        node = np.repeat(start, count) + offsets
+
+    return acc
+
+def calcTreeAcceleration(pos, mass, theta, targets=None):
+
+    tree = buildTree(pos, mass)
+    if targets is None:
+        targets = np.arange(len(pos))
+
+    acc = np.empty((len(targets), 3))
+    for start in range(0, len(targets), BATCH):
+        batch = targets[start:start + BATCH]
+        acc[start:start + BATCH] = walkTree(tree, pos, mass, batch, theta)
+
+    return acc
+
+def forceError(pos, mass, theta, samples=1000, seed=0):
+
+    # Relative error of the body-body forces against direct summation on a
+    # random sample of bodies; the star term is exact in both and left out
+    rng = np.random.default_rng(seed)
+    targets = np.sort(rng.choice(len(pos), size=min(samples, len(pos)), replace=False))
+
+    exact = calcAcceleration(pos, mass, np.zeros(3), 0.0, targets)
+    approx = calcTreeAcceleration(pos, mass, theta, targets)
+    scale = np.linalg.norm(exact, axis=-1)
+    error = np.linalg.norm(approx - exact, axis=-1) / np.where(scale > 0, scale, 1)
+
+    return {'median': float(np.median(error)), 'p99': float(np.percentile(error, 99)), 'max': float(error.max())}
+
+class BarnesHut:
+
+    def __init__(self, mass, star_pos, star_mass, theta=0.5):
+        self.mass = np.asarray(mass, dtype=np.float64)
+        self.star_pos = star_pos
+        self.star_mass = star_mass
+        self.theta = theta
+
+    def __call__(self, pos):
+
+        acc = calcTreeAcceleration(pos, self.mass, self.theta)
+        acc += calcStarAcceleration(pos, self.star_pos, self.star_mass)
+
+        return acc
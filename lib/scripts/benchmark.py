@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from lib.scripts.bodies import Body, Star, SYSTEM_PRESETS_PATH, loadSystem
+from lib.scripts.catalog import presetFiles
+from lib.scripts.simulation import BACKEND_METHODS, METHODS, simulate
+
+# Mass (kg) and radius (km) of the star synthetic systems orbit
+SUN_MASS = 1.989e30
+SUN_RADIUS = 696000
+G = 6.674e-11
+AU = 1.496e+8
+
+# Methods benchmarked by default; the multiprocess euler engine and the
+# compiled kernels are entries of their own since they scale so differently
+BENCH_METHODS = {name: (name, {}) for name in METHODS}
+BENCH_METHODS['euler-multiprocess'] = ('euler', {'multiprocess': True})
+for name in BACKEND_METHODS:
+    BENCH_METHODS[name + '-numba'] = (name, {'backend': 'numba'})
+
+# A case regresses when its steps/second drops, or its peak memory grows,
+# by more than this fraction of the baseline
+TOLERANCE = 0.2
+
+
+def syntheticSystem(n, seed=0):
+
+    # n light bodies on circular orbits between 0.3 and 40 AU, with small
+    # inclinations. The same n and seed always give the same system
+    rng = np.random.default_rng(seed)
+    sma = AU * np.exp(rng.uniform(np.log(0.3), np.log(40), n))
+    vel = np.sqrt(G * SUN_MASS / (sma * 1000)) / 1000
+    mass = 10 ** rng.uniform(20, 25, n)
+    radius = rng.uniform(100, 70000, n)
+    inc = rng.uniform(-5, 5, n)
+
+    star = Star('Synthetic', SUN_MASS, SUN_RADIUS)
+    bodies = [Body('Body %d' % i, mass[i], radius[i], sma[i], vel[i], inc[i]) for i in range(n)]
+
+    return star, bodies
+
+def systemLoaders(presets, counts, seed=0):
+
+    # (label, loader) per system. The solvers modify the bodies they are
+    # given, so every run loads a fresh copy
+    loaders = []
+    for path in presets:
+        loaders.append((os.path.splitext(os.path.basename(path))[0], lambda path=path: loadSystem(path)))
+    for n in counts:
+        loaders.append(('synthetic-%d' % n, lambda n=n: syntheticSystem(n, seed)))
+
+    return loaders
+
+def runCase(load, method, steps, step, report, max_time, repeat, memory):
+
+    # Best of repeat timed runs, then one more under tracemalloc for the
+    # peak memory so tracing does not slow the timed ones. A run that hits
+    # max_time is scored on the steps it got through
+    name, options = BENCH_METHODS[method]
+    best = None
+    for i in range(repeat):
+        star, bodies = load()
+        start = time.perf_counter()
+        results = simulate(star, bodies, name, steps, step, report, max_time=max_time, **options)
+        elapsed = time.perf_counter() - start
+        done = results.t_reached / step
+        rate = done / elapsed if elapsed > 0 else float('inf')
+        if best is None or rate > best['steps_per_second']:
+            best = {'steps_per_second': rate, 'seconds': elapsed, 'steps_done': done,
+                    'truncated': results.truncated}
+
+    best['bodies'] = len(bodies)
+    best['peak_bytes'] = None
+    if memory == True:
+        star, bodies = load()
+        tracemalloc.start()
+        simulate(star, bodies, name, steps, step, report, max_time=max_time, **options)
+        best['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return best
+
+def caseKey(method, system, steps, report):
+    return '%s/%s/%d/%d' % (method, system, steps, report)
+
+def compare(results, baseline, tolerance=TOLERANCE):
+
+    # Cases that are slower, or use more memory, than the baseline by more
+    # than tolerance, as (key, message) pairs
+    regressions = []
+    for key, case in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if case['steps_per_second'] < old['steps_per_second'] * (1 - tolerance):
+            regressions.append((key, 'steps/s %.4g -> %.4g' % (old['steps_per_second'], case['steps_per_second'])))
+        if case['peak_bytes'] is not None and old.get('peak_bytes') is not None:
+            if case['peak_bytes'] > old['peak_bytes'] * (1 + tolerance):
+                regressions.append((key, 'peak memory %s -> %s' % (formatBytes(old['peak_bytes']), formatBytes(case['peak_bytes']))))
+
+    return regressions
+
+def formatBytes(size):
+
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return '%.1f %s' % (size, unit)
+        size /= 1024
+
+    return '%.1f GiB' % size
+
+def environment():
+
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+def parseArgs(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmark the solvers over body count, step count and report frequency.')
+    parser.add_argument('--methods', nargs='+', default=sorted(BENCH_METHODS), choices=sorted(BENCH_METHODS))
+    parser.add_argument('--systems', nargs='*', help='system csv files to include; defaults to every bundled preset')
+    parser.add_argument('--bodies', nargs='*', type=int, default=[100, 1000, 3000], help='sizes of synthetic systems')
+    parser.add_argument('--steps', nargs='+', type=int, default=[1000])
+    parser.add_argument('--report', nargs='+', type=int, default=[1, 10], help='record a sample every REPORT steps')
+    parser.add_argument('--step', type=float, default=86400, help='time step in seconds')
+    parser.add_argument('--max-time', type=float, default=10, help='wall-clock budget per run in seconds')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case; the best is kept')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the synthetic systems')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    parser.add_argument('--out', help='write the results to this json file')
+    parser.add_argument('--baseline', help='json file from an earlier --out to check for regressions against')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed slowdown or memory growth as a fraction')
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+
+    # python -m lib.scripts.benchmark --out baseline.json, then later
+    # python -m lib.scripts.benchmark --baseline baseline.json, which exits
+    # with 1 when any case regressed
+    args = parseArgs(argv)
+    presets = presetFiles(SYSTEM_PRESETS_PATH) if args.systems is None else args.systems
+
+    results = {}
+    print('%-20s %-18s %7s %6s %6s %12s %9s %11s' % ('method', 'system', 'bodies', 'steps', 'report', 'steps/s', 'seconds', 'peak'))
+    for system, load in systemLoaders(presets, args.bodies, args.seed):
+        for method in args.methods:
+            for steps in args.steps:
+                for report in args.report:
+                    case = runCase(load, method, steps, args.step, report, args.max_time, args.repeat, not args.no_memory)
+                    results[caseKey(method, system, steps, report)] = case
+                    peak = '-' if case['peak_bytes'] is None else formatBytes(case['peak_bytes'])
+                    print('%-20s %-18s %7d %6d %6d %12.4g %9.3f %11s%s' % (method, system, case['bodies'], steps, report,
+                          case['steps_per_second'], case['seconds'], peak, ' truncated' if case['truncated'] else ''))
+                    sys.stdout.flush()
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'environment': environment(), 'cases': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['cases'], args.tolerance)
+        for key, message in regressions:
+            print('REGRESSION %s: %s' % (key, message))
+        if regressions:
+            return 1
+        print('No regressions against %s' % args.baseline)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import csv
+import os
+
+import numpy as np
+
+PRESETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'presets')
+SYSTEM_PRESETS_PATH = os.path.join(PRESETS_PATH, 'systems')
+
+
+class Body:
+
+    # Slots rather than a __dict__ per body, since systems can hold thousands
+    __slots__ = ('id', 'name', 'color', 'mass', 'radius', 'sma', 'vel', 'inc', 'x', 'y', 'z',
+                 'ax', 'ay', 'az', 'vx', 'vy', 'vz', 'soi', 'parent')
+
+    def __init__(self, name, mass, radius, sma, vel, inc):
+        self.id = None
+        self.name = name
+        self.color = None
+        self.mass = mass
+        self.radius = radius
+        self.sma = sma
+        self.vel = vel
+        self.inc = inc
+        self.x = None
+        self.y = None
+        self.z = None
+        self.ax = 0
+        self.ay = 0
+        self.az = 0
+        self.vx = None
+        self.vy = None
+        self.vz = None
+        self.soi = None
+        self.parent = None
+
+class Star:
+
+    __slots__ = ('name', 'mass', 'radius', 'x', 'y', 'z', 'soi')
+
+    def __init__(self, name, mass, radius):
+        self.name = name
+        self.mass = mass
+        self.radius = radius
+        self.x = 0
+        self.y = 0
+        self.z = 0
+        self.soi = None
+
+class BodyRegistry:
+
+    # The bodies of a system keyed by stable integer ids, which are never
+    # reused. Iteration follows the order bodies were added in. Names may
+    # repeat, since lookups, edits and removals go by id and never scan the
+    # whole system
+    def __init__(self, bodies=()):
+        self.bodies = {}
+        self.next_id = 0
+        for body in bodies:
+            self.add(body)
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def __iter__(self):
+        return iter(self.bodies.values())
+
+    def __contains__(self, body_id):
+        return body_id in self.bodies
+
+    def add(self, body):
+
+        body.id = self.next_id
+        self.next_id += 1
+        self.bodies[body.id] = body
+
+        return body.id
+
+    def get(self, body_id):
+        return self.bodies[body_id]
+
+    def remove(self, body_id):
+
+        return self.bodies.pop(body_id)
+
+    def update(self, body_id, **values):
+
+        body = self.bodies[body_id]
+        for attribute, value in values.items():
+            setattr(body, attribute, value)
+
+        return body
+
+    def ids(self):
+        return list(self.bodies)
+
+    def clear(self):
+
+        self.bodies.clear()
+
+        return
+
+    def columns(self):
+
+        # The system as arrays in iteration order, one per attribute, which
+        # simulate() takes in place of the Body objects
+        bodies = list(self.bodies.values())
+        columns = {'id': np.array(self.ids(), dtype=np.int64), 'name': [body.name for body in bodies]}
+        for attribute in ('mass', 'radius', 'sma', 'vel', 'inc'):
+            columns[attribute] = np.array([getattr(body, attribute) for body in bodies], dtype=np.float64)
+        columns['color'] = [body.color for body in bodies]
+
+        return columns
+
+
+def findSystem(name):
+
+    # Accepts a path, or the file name of one of the bundled system presets
+    if os.path.exists(name):
+        return name
+    preset = os.path.join(SYSTEM_PRESETS_PATH, name)
+    if os.path.exists(preset):
+        return preset
+    if os.path.exists(preset + '.csv'):
+        return preset + '.csv'
+
+    raise FileNotFoundError("No system file or preset named '%s'" % name)
+
+def loadSystem(path):
+
+    star = None
+    bodies = []
+
+    with open(path, 'r') as f:
+        reader = csv.reader(f, delimiter=',')
+        next(reader)
+        for row in reader:
+            if row[0] == "s":
+                star = Star(row[1],float(row[2]),float(row[3]))
+            if row[0] == "p":
+                bodies.append(Body(row[1],float(row[2]),float(row[3]),float(row[4]),float(row[5]),float(row[6])))
+
+    return star, bodies
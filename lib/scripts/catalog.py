@@ -0,0 +1,129 @@
+import bisect
+import csv
+import glob
+import os
+
+import numpy as np
+
+from lib.scripts.bodies import PRESETS_PATH
+
+STAR_DATA_PATH = os.path.join(PRESETS_PATH, 'stars', 'star_data.csv')
+STAR_PRESETS_PATH = os.path.join(PRESETS_PATH, 'stars', 'star_presets.csv')
+BODY_PRESETS_PATH = os.path.join(PRESETS_PATH, 'bodies', 'body_presets.csv')
+
+# Parsed catalogs and preset folder listings, keyed by path and checked
+# against the file or folder mtime on every load
+catalogs = {}
+folders = {}
+
+
+def columnName(header):
+
+    # 'Alt Name:' -> 'alt_name', 'Mass (kg)' -> 'mass'
+    return header.split('(')[0].split(':')[0].strip().lower().replace(' ', '_')
+
+def parseColumn(values):
+
+    # Numeric columns become float64 arrays with NaN for blanks; anything
+    # else is kept as a string array
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    try:
+        return np.array([float(value) if value.strip() else np.nan for value in values], dtype=np.float64)
+    except ValueError:
+        return np.array(values, dtype=str)
+
+class Catalog:
+
+    # A csv file parsed once into one typed array per column, with dict
+    # indexes for exact lookups and sorted keys for prefix search on the
+    # indexed columns. Lookups ignore case
+    def __init__(self, path, indexed=('name',)):
+        self.path = path
+
+        with open(path, 'r') as f:
+            reader = csv.reader(f, delimiter=',')
+            headers = [columnName(header) for header in next(reader)]
+            rows = [row for row in reader if row]
+
+        # Short rows are padded with blanks
+        width = len(headers)
+        rows = [row + [''] * (width - len(row)) if len(row) < width else row for row in rows]
+        columns = list(zip(*rows)) if rows else [()] * width
+        # Indexed columns stay strings even when every entry is blank or a
+        # number, e.g. catalog numbers as names
+        self.columns = {name: np.array(values, dtype=str) if name in indexed else parseColumn(list(values))
+                        for name, values in zip(headers, columns)}
+        self.size = len(rows)
+
+        self.index = {}
+        keys = []
+        rows = []
+        for name in indexed:
+            if name not in self.columns:
+                continue
+            for row, key in enumerate(self.columns[name].tolist()):
+                key = key.lower()
+                if key:
+                    self.index.setdefault(key, row)
+                    keys.append(key)
+                    rows.append(row)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.key_rows = np.array(rows, dtype=np.int64)[order]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def row(self, row):
+
+        # One entry as a dict of plain Python values
+        return {name: column[row].item() for name, column in self.columns.items()}
+
+    def find(self, name):
+
+        # Row of the entry with this name or alternate name, or None
+        return self.index.get(name.strip().lower())
+
+    def search(self, prefix):
+
+        # Rows whose name or alternate name starts with prefix, in file order
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return np.arange(self.size)
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = bisect.bisect_left(self.keys, prefix + '￿')
+
+        return np.unique(self.key_rows[start:stop])
+
+def loadCatalog(path, indexed=('name',)):
+
+    # Parses the file the first time and again only when it changes
+    key = (os.path.abspath(path), tuple(indexed))
+    mtime = os.path.getmtime(path)
+    if key not in catalogs or catalogs[key][0] != mtime:
+        catalogs[key] = (mtime, Catalog(path, indexed))
+
+    return catalogs[key][1]
+
+def loadStarData(path=STAR_DATA_PATH):
+    return loadCatalog(path, ('name', 'alt_name'))
+
+def presetFiles(folder, pattern='*.csv'):
+
+    # Sorted file list of a preset folder, globbed again only when the
+    # folder changes
+    key = (os.path.abspath(folder), pattern)
+    mtime = os.path.getmtime(folder)
+    if key not in folders or folders[key][0] != mtime:
+        folders[key] = (mtime, sorted(glob.glob(os.path.join(folder, pattern))))
+
+    return folders[key][1]
@@ -0,0 +1,137 @@
+import numpy as np
+
+from lib.scripts import profiling
+
+# Samples per bucket at the finest level; below it the samples are used directly
+BASE_BUCKET = 8
+# Levels are added while the coarsest one would still have this many buckets
+MIN_BUCKETS = 256
+
+# Columns of a level: the samples with the smallest and largest x, y and z
+AXES = np.array([0, 0, 1, 1, 2, 2])
+MAXIMA = np.array([False, True, False, True, False, True])
+
+
+class Pyramid:
+
+    # Min/max decimation pyramid over one body's track. Level k splits the
+    # samples into buckets of BASE_BUCKET * 2**k and keeps, per bucket, the
+    # indices of the samples with the smallest and largest x, y and z, so
+    # every level has the same extent as the full track. positions is the
+    # whole (samples, 3) buffer, which may still be filling; extend() takes
+    # in samples up to a count as they arrive
+    def __init__(self, positions):
+        self.positions = positions
+        self.count = 0
+        self.levels = []
+        self.filled = []
+        buckets = len(positions) // BASE_BUCKET
+        while buckets >= MIN_BUCKETS:
+            self.levels.append(np.empty((buckets, 6), dtype=np.int64))
+            self.filled.append(0)
+            buckets //= 2
+
+    @profiling.phase('decimate')
+    def extend(self, count):
+
+        self.count = count
+        for k, level in enumerate(self.levels):
+            start = self.filled[k]
+            stop = min(count // (BASE_BUCKET << k), len(level))
+            if stop <= start:
+                break
+            if k == 0:
+                # Finest level straight from the samples
+                block = self.positions[start*BASE_BUCKET:stop*BASE_BUCKET].reshape(-1, BASE_BUCKET, 3)
+                offsets = np.arange(start, stop)[:, None] * BASE_BUCKET
+                level[start:stop, 0::2] = block.argmin(axis=1) + offsets
+                level[start:stop, 1::2] = block.argmax(axis=1) + offsets
+            else:
+                # Every other level from pairs of buckets of the one below
+                finer = self.levels[k - 1]
+                a = finer[2*start:2*stop:2]
+                b = finer[2*start + 1:2*stop:2]
+                value_a = self.positions[a, AXES]
+                value_b = self.positions[b, AXES]
+                level[start:stop] = np.where(np.where(MAXIMA, value_b > value_a, value_b < value_a), b, a)
+            self.filled[k] = stop
+
+        return
+
+    def bounds(self, k, buckets):
+
+        # (x min, x max, y min, y max) of some buckets of level k
+        rows = self.levels[k][buckets]
+        return (self.positions[rows[:, 0], 0], self.positions[rows[:, 1], 0],
+                self.positions[rows[:, 2], 1], self.positions[rows[:, 3], 1])
+
+    def select(self, budget, rect=None):
+
+        # Sample indices to draw: starting from the coarsest level, descends
+        # into the buckets that overlap rect (x0, x1, y0, y1; None for all)
+        # until they give about budget points. Returns the indices in time
+        # order and a mask of where the drawn track is broken by a gap
+        top = next((k for k in range(len(self.levels) - 1, -1, -1) if self.filled[k] > 0), None)
+        if top is None:
+            # Short tracks are drawn whole, as a view of the buffer
+            return slice(0, self.count), np.zeros(self.count, dtype=bool)
+
+        k = top
+        buckets = np.arange(self.filled[top])
+        while True:
+            if rect is not None:
+                x_min, x_max, y_min, y_max = self.bounds(k, buckets)
+                hit = (x_max >= rect[0]) & (x_min <= rect[1]) & (y_max >= rect[2]) & (y_min <= rect[3])
+                # Keep the neighbours of visible buckets so lines run off the edge
+                near = hit.copy()
+                near[1:] |= hit[:-1]
+                near[:-1] |= hit[1:]
+                buckets = buckets[near]
+            if k < 0 or len(buckets) * 6 >= budget:
+                break
+            # Children of the kept buckets, one level finer
+            if k == 0:
+                buckets = (buckets[:, None] * BASE_BUCKET + np.arange(BASE_BUCKET)).ravel()
+                rect = None
+            else:
+                buckets = (buckets[:, None] * 2 + np.arange(2)).ravel()
+                buckets = buckets[buckets < self.filled[k - 1]]
+            k -= 1
+
+        if k < 0:
+            indices = buckets
+            starts = np.ones(len(buckets), dtype=bool)
+            starts[1:] = np.diff(buckets) != 1
+        else:
+            rows = np.sort(self.levels[k][buckets], axis=1)
+            indices = rows.ravel()
+            starts = np.zeros(rows.shape, dtype=bool)
+            starts[1:, 0] = np.diff(buckets) != 1
+            starts = starts.ravel()
+            # The same sample is often an extreme on more than one axis
+            keep = np.ones(len(indices), dtype=bool)
+            keep[1:] = np.diff(indices) != 0
+            indices, starts = indices[keep], starts[keep]
+
+        # Samples after the last full bucket of the coarsest level
+        covered = self.filled[top] * (BASE_BUCKET << top)
+        tail = np.arange(covered, self.count)
+        tail_starts = np.zeros(len(tail), dtype=bool)
+        if len(tail) > 0 and (len(indices) == 0 or indices[-1] < covered - (BASE_BUCKET << top)):
+            tail_starts[0] = True
+        indices = np.concatenate((indices, tail))
+        starts = np.concatenate((starts, tail_starts))
+        if len(starts) > 0:
+            starts[0] = False
+
+        return indices, starts
+
+def gapped(values, starts):
+
+    # Inserts a NaN before every gap so PlotDataItem(connect='finite')
+    # breaks the line there rather than joining across it. Without gaps
+    # the values are returned as they are, views included
+    if not starts.any():
+        return values
+
+    return np.insert(values.astype(np.float64), np.flatnonzero(starts), np.nan, axis=0)
@@ -0,0 +1,155 @@
+import time
+
+import numpy as np
+
+from lib.scripts import profiling
+from lib.scripts.euler import initialState
+from lib.scripts.kernels import makeAcceleration, resolveBackend
+from lib.scripts.nbody import unpackBodies
+from lib.scripts.trajectory import Trajectory, bodyMeta
+
+# Dormand-Prince 5(4) tableau. The last row of A doubles as the 5th order
+# weights, and its final stage is reused as the first stage of the next step
+A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+B = [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]
+E = [71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40]
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+# Accepted steps between solve-time budget checks, and the furthest the
+# tolerances may be loosened to finish inside the budget
+BUDGET_WINDOW = 16
+MAX_LOOSEN = 1e6
+
+
+def combine(base, h, coeffs, stages):
+
+    total = base.copy()
+    for coeff, stage in zip(coeffs, stages):
+        if coeff != 0:
+            total += (h*coeff) * stage
+
+    return total
+
+def dopriStep(pos, vel, acc, accel, h):
+
+    kx = [vel]
+    kv = [acc]
+    for row in A[1:]:
+        stage_pos = combine(pos, h, row, kx)
+        stage_vel = combine(vel, h, row, kv)
+        kx.append(stage_vel)
+        kv.append(accel(stage_pos))
+
+    new_pos = combine(pos, h, B, kx)
+    new_vel = combine(vel, h, B, kv)
+    new_acc = accel(new_pos)
+    kx.append(new_vel)
+    kv.append(new_acc)
+
+    err_pos = combine(np.zeros_like(pos), h, E, kx)
+    err_vel = combine(np.zeros_like(vel), h, E, kv)
+
+    return new_pos, new_vel, new_acc, err_pos, err_vel
+
+def errorNorm(err, old, new, rtol, atol):
+
+    # Scaled per body on vector lengths, so a coordinate passing through zero
+    # does not tighten the tolerance
+    scale = atol + rtol * np.maximum(np.linalg.norm(old, axis=-1), np.linalg.norm(new, axis=-1))
+
+    return np.linalg.norm(err, axis=-1) / scale
+
+def reportTime(k, reports, t_report, t_end):
+
+    # Time of the k-th report; the last one is t_end exactly
+    return t_end if k >= reports else min(k * t_report, t_end)
+
+def integrate(pos, vel, accel, t_end, t_report, h, rtol, atol, callback=None, store=None, meta=None, deadline=None, velocities=False):
+
+    accel = profiling.timed('force', accel)
+    acc = accel(pos)
+    t = 0.0
+    # Report times come from a counter rather than repeated addition, whose
+    # rounding could leave the last one just short of t_end and record one
+    # sample more than the buffer holds
+    reports = int(np.ceil(t_end / t_report))
+    body_history = Trajectory(reports + 1, pos.shape, store, meta, velocities)
+    body_history.record(pos, t, vel)
+    record = profiling.timed('record', body_history.record)
+    accepted, rejected = 0, 0
+    reported = 1
+    t_next = reportTime(reported, reports, t_report, t_end)
+    loosen = 1.0
+    window_t, window_clock = t, time.perf_counter()
+
+    while t < t_end:
+        clipped = h >= t_next - t
+        h_try = t_next - t if clipped else h
+        new_pos, new_vel, new_acc, err_pos, err_vel = dopriStep(pos, vel, acc, accel, h_try)
+        err = np.sqrt(np.mean(np.concatenate((
+            errorNorm(err_pos, pos, new_pos, rtol*loosen, atol*loosen),
+            errorNorm(err_vel, vel, new_vel, rtol*loosen, atol*loosen)))**2))
+
+        if err <= 1:
+            accepted += 1
+            t = t_next if clipped else t + h_try
+            pos, vel, acc = new_pos, new_vel, new_acc
+            factor = MAX_FACTOR if err == 0 else min(MAX_FACTOR, SAFETY * err**-0.2)
+            # A step clipped to land on a report time should not shrink the next one
+            h = max(h, h_try * factor) if clipped else h_try * factor
+
+            if clipped:
+                record(pos, t, vel)
+                reported += 1
+                t_next = reportTime(reported, reports, t_report, t_end)
+
+            # Behind schedule for the budget: loosen the tolerances by the
+            # speed-up still needed, which for a 5th order method is ~speedup**5
+            if deadline is not None and accepted % BUDGET_WINDOW == 0:
+                now = time.perf_counter()
+                rate = (t - window_t) / max(now - window_clock, 1e-9)
+                window_t, window_clock = t, now
+                remaining = deadline - now
+                if remaining > 0 and rate > 0:
+                    speedup = (t_end - t) / (rate * remaining)
+                    if speedup > 1:
+                        loosen = min(loosen * speedup**5, MAX_LOOSEN)
+        else:
+            rejected += 1
+            h = h_try * max(MIN_FACTOR, SAFETY * err**-0.2)
+
+        if callback is not None and callback(t, body_history) == False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    body_history.finish(t, t < t_end, accepted=accepted, rejected=rejected, tolerance_scale=loosen)
+    stats = {'accepted': accepted, 'rejected': rejected, 'tolerance_scale': loosen}
+
+    return pos, vel, body_history, stats
+
+def main(star, bodies, steps, step, report, rtol=1e-9, atol=1e-3, store=None, progress=None, deadline=None, velocities=False,
+         backend='numpy'):
+
+    def updateProgress(t, body_history):
+        if progress is not None:
+            return progress(int(t / step), steps, body_history)
+
+    pos, vel, mass, star_pos, star_mass = initialState(star, bodies)
+    backend = resolveBackend(backend)
+    accel = makeAcceleration(mass, star_pos, star_mass, backend)
+    pos, vel, body_history, stats = integrate(pos, vel, accel, steps*step, report*step, step, rtol, atol, updateProgress,
+                                               store, bodyMeta(bodies, step=step, report=report), deadline, velocities)
+
+    unpackBodies(bodies, pos, vel)
+
+    return body_history
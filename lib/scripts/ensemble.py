@@ -0,0 +1,81 @@
+import copy
+import time
+
+import numpy as np
+
+from lib.scripts import profiling
+from lib.scripts.euler import convertUnits
+from lib.scripts.nbody import packBodies, makeAcceleration, eulerStep
+from lib.scripts.rk4 import rk4Step
+from lib.scripts.leapfrog import leapfrogStep
+from lib.scripts.trajectory import Trajectory, reportSamples, bodyMeta
+
+METHODS = ('euler', 'rk4', 'leapfrog')
+
+
+def makeVariants(bodies, index, attribute, values):
+
+    # One copy of the system per value, with bodies[index].<attribute> replaced,
+    # e.g. makeVariants(bodies, 2, 'sma', np.linspace(1.4e8, 1.6e8, 100))
+    variants = []
+    for value in values:
+        variant = copy.deepcopy(bodies)
+        setattr(variant[index], attribute, float(value))
+        variants.append(variant)
+
+    return variants
+
+def packEnsemble(stars, variants):
+
+    if not isinstance(stars, (list, tuple)):
+        stars = [stars] * len(variants)
+    if len(stars) != len(variants):
+        raise ValueError("Expected one star per variant, got %d stars for %d variants" % (len(stars), len(variants)))
+    if len(set(len(bodies) for bodies in variants)) > 1:
+        raise ValueError("All variants must have the same number of bodies")
+
+    packed = []
+    for star, bodies in zip(stars, variants):
+        convertUnits(bodies)
+        packed.append(packBodies(star, bodies))
+
+    pos, vel, mass, star_pos, star_mass = (np.stack(column) for column in zip(*packed))
+
+    return pos, vel, mass, star_pos, star_mass
+
+def main(stars, variants, steps, step, report, method='euler', store=None, progress=None, deadline=None, velocities=False):
+
+    # Integrates K variants of an N body system as one (K, N, 3) state and
+    # returns a single (samples, K, N, 3) Trajectory; variant(k) gives the
+    # history of one variant in the same layout as a single run
+    if method not in METHODS:
+        raise ValueError("Unknown ensemble method '%s', expected one of %s" % (method, ', '.join(METHODS)))
+
+    pos, vel, mass, star_pos, star_mass = packEnsemble(stars, variants)
+    accel = makeAcceleration(mass, star_pos, star_mass)
+    acc = accel(pos) if method == 'leapfrog' else None
+    history = Trajectory(reportSamples(steps, report), pos.shape, store,
+                         bodyMeta(variants[0], step=step, report=report, method=method), velocities)
+    history.record(pos, 0, vel)
+    force = profiling.timed('force', accel)
+    record = profiling.timed('record', history.record)
+
+    done = 0
+    for i in range(0, steps):
+        if progress is not None and progress(i, steps, history) == False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if method == 'euler':
+            eulerStep(pos, vel, force, step)
+        if method == 'rk4':
+            rk4Step(pos, vel, force, step)
+        if method == 'leapfrog':
+            leapfrogStep(pos, vel, acc, force, step)
+        if i % report == 0:
+            record(pos, (i + 1)*step, vel)
+        done = i + 1
+
+    history.finish(done*step, done < steps)
+
+    return history
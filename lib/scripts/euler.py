@@ -1,13 +1,21 @@
+import time
+
 import numpy as np
 from math import sqrt
-from PyQt5 import QtWidgets
 
-from threading import Thread
+from lib.scripts.nbody import packBodies, packColumns, unpackBodies
+from lib.scripts.parallel import ForcePool
+from lib.scripts import profiling
+from lib.scripts.barnes_hut import BarnesHut
+from lib.scripts.kernels import makeAcceleration, makeEulerStep, resolveBackend
+from lib.scripts.trajectory import Trajectory, reportSamples, bodyMeta
 
 G = 6.674e-11
 
 def calcAcceleration(star, bodies, skip_num):
 
+    # Original object-based step, kept for reference; main uses
+    # nbody.eulerStep, which sums the forces symmetrically (see there)
     X,Y,Z = 0,1,2
 
 
@@ -38,29 +46,6 @@ def calcAcceleration(star, bodies, skip_num):
 
     return
 
-def multiProcessAcceleration(body, otherBody, skip_num):
-
-    body.ax, body.ay, body.az = 0, 0, 0
-
-    dist = (body.x - otherBody.x) ** 2 + (body.y - otherBody.y) ** 2 + (body.z - otherBody.z) ** 2
-    dist = sqrt(dist)
-    a_scal = G * otherBody.mass / dist ** 3
-    body.ax += a_scal * (otherBody.x - body.x)
-    body.ay += a_scal * (otherBody.y - body.y)
-    body.az += a_scal * (otherBody.z - body.z)
-
-    return
-
-def multiProcessVelPosUpdate(body, skip_num):
-
-    body.vx += body.ax * skip_num
-    body.vy += body.ay * skip_num
-    body.vz += body.az * skip_num
-    body.x += body.vx * skip_num
-    body.y += body.vy * skip_num
-    body.z += body.vz * skip_num
-
-
 def convertUnits(bodies):
 
     for body in bodies:
@@ -73,54 +58,58 @@ def convertUnits(bodies):
 
     return
 
-def main(star, bodies, t_step, skip_num, report, multiprocess):
-    convertUnits(bodies)
-    body_history = []
-    progress = QtWidgets.QProgressDialog("Computing timesteps..","Cancel",0,t_step)
-    progress.setWindowTitle('Please wait...')
-    progress.setModal(True)
-    progress.setValue(0)
-    progress.show()
-    QtWidgets.QApplication.processEvents()
+def initialState(star, bodies):
 
-    for body in bodies:
-        body_history.append([[body.x, body.y, body.z]])
+    # bodies is a list of Body objects, or BodyRegistry.columns()
+    if isinstance(bodies, dict):
+        return packColumns(star, bodies)
+    convertUnits(bodies)
 
-    if multiprocess == 1:
+    return packBodies(star, bodies)
+
+def main(star, bodies, t_step, skip_num, report, multiprocess, theta=None, store=None, progress=None, deadline=None, velocities=False,
+         backend='numpy'):
+    pos, vel, mass, star_pos, star_mass = initialState(star, bodies)
+    body_history = Trajectory(reportSamples(t_step, report), pos.shape, store, bodyMeta(bodies, step=skip_num, report=report), velocities)
+    body_history.record(pos, 0, vel)
+
+    # backend only applies to direct summation
+    if theta is not None:
+        accel = BarnesHut(mass, star_pos, star_mass, theta)
+        backend = 'numpy'
+    elif multiprocess == 1:
+        accel = ForcePool(mass, star_pos, star_mass)
+        backend = 'numpy'
+    else:
+        backend = resolveBackend(backend)
+        accel = makeAcceleration(mass, star_pos, star_mass, backend)
+
+    done = 0
+    try:
+        # A compiled step includes the force evaluation, so 'force' then
+        # times the whole step
+        advance = makeEulerStep(mass, star_pos, star_mass, profiling.timed('force', accel), backend)
+        if backend != 'numpy':
+            advance = profiling.timed('force', advance)
+        record = profiling.timed('record', body_history.record)
 
         for i in range(0, t_step):
-            progress.setValue(i)
-            if progress.wasCanceled() == True:
+            if progress is not None and progress(i, t_step, body_history) == False:
                 break
-            QtWidgets.QApplication.processEvents()
-
-            for body in bodies:
-                temp_body_list = [planet for planet in bodies]
-                temp_body_list.remove(body)
-                temp_body_list.append(star)
-                for otherBody in temp_body_list:
-                    t = Thread(name=body.name+' vs.'+otherBody.name, target=multiProcessAcceleration, args=(body, otherBody, skip_num))
-                    t.start()
-                multiProcessVelPosUpdate(body, skip_num)
-
-
-            if i % report == 0:
-                for i, body in enumerate(bodies):
-                    body_history[i].append([body.x, body.y, body.z])
-
-
-    if multiprocess == 0:
-        for i in range(0, t_step):
-            progress.setValue(i)
-            if progress.wasCanceled() == True:
+            if deadline is not None and time.perf_counter() >= deadline:
                 break
-            QtWidgets.QApplication.processEvents()
-            calcAcceleration(star, bodies, skip_num)
+            advance(pos, vel, skip_num)
             if i % report == 0:
-                for i, body in enumerate(bodies):
-                    body_history[i].append([body.x, body.y, body.z])
-
-    progress.close()
+                record(pos, (i + 1)*skip_num, vel)
+            done = i + 1
+    finally:
+        # Also on errors, so a failed run does not leave the workers and
+        # their shared memory behind
+        if isinstance(accel, ForcePool):
+            accel.close()
+
+    unpackBodies(bodies, pos, vel)
+    body_history.finish(done*skip_num, done < t_step)
 
     return body_history
 
@@ -0,0 +1,106 @@
+import argparse
+import importlib.util
+import sys
+import warnings
+
+import numpy as np
+
+from lib.scripts import nbody
+
+# Numba is optional; without it every backend runs the NumPy kernels. The
+# compiled kernels are in lib.scripts.numba_kernels, imported on first use
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+BACKENDS = ('numpy', 'numba')
+
+
+def resolveBackend(backend):
+
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend '%s', expected one of %s" % (backend, ', '.join(BACKENDS)))
+    if backend == 'numba' and HAVE_NUMBA == False:
+        warnings.warn("Numba is not installed, using the NumPy kernels", RuntimeWarning)
+        return 'numpy'
+
+    return backend
+
+def makeAcceleration(mass, star_pos, star_mass, backend='numpy'):
+
+    # accel(pos) for an (N, 3) system on the given backend
+    if resolveBackend(backend) == 'numpy':
+        return nbody.makeAcceleration(mass, star_pos, star_mass)
+
+    from lib.scripts.numba_kernels import accelerationKernel
+
+    def accel(pos):
+        acc = np.empty_like(pos)
+        accelerationKernel(pos, mass, star_pos, star_mass, acc)
+        return acc
+
+    return accel
+
+def makeEulerStep(mass, star_pos, star_mass, accel, backend='numpy'):
+
+    # step(pos, vel, dt) advancing in place; the compiled one fuses the
+    # force evaluation into the update, so accel is only used by NumPy
+    if resolveBackend(backend) == 'numpy':
+        return lambda pos, vel, dt: nbody.eulerStep(pos, vel, accel, dt)
+
+    from lib.scripts.numba_kernels import eulerKernel
+
+    return lambda pos, vel, dt: eulerKernel(pos, vel, mass, star_pos, star_mass, dt)
+
+def kernelError(pos, mass, star_pos, star_mass, backend, samples=1000, seed=0):
+
+    # Relative error of the backend's accelerations against the NumPy
+    # reference on a random sample of bodies, as median, 99th percentile and
+    # worst body. Sampling keeps the reference at samples x N rather than
+    # the N x N temporaries the compiled kernels avoid
+    rng = np.random.default_rng(seed)
+    targets = np.sort(rng.choice(len(pos), size=min(samples, len(pos)), replace=False))
+
+    reference = nbody.calcAcceleration(pos, mass, star_pos, star_mass, targets)
+    acc = makeAcceleration(mass, star_pos, star_mass, backend)(pos)[targets]
+    error = np.linalg.norm(acc - reference, axis=-1) / np.linalg.norm(reference, axis=-1)
+
+    return {'median': float(np.median(error)), 'p99': float(np.percentile(error, 99)), 'max': float(error.max())}
+
+def main(argv=None):
+
+    # python -m lib.scripts.kernels runs each method on a preset with the
+    # NumPy and the compiled kernels and compares the two: the accelerations
+    # at the start and the positions at the end. Exits with 1 when either
+    # differs by more than the tolerance
+    from lib.scripts.bodies import findSystem, loadSystem
+    from lib.scripts.simulation import BACKEND_METHODS, simulate, forceError
+
+    parser = argparse.ArgumentParser(description='Check the compiled force kernels against the NumPy ones.')
+    parser.add_argument('--system', default='Solar System.csv', help='system preset name or path to a system csv')
+    parser.add_argument('--methods', nargs='+', default=list(BACKEND_METHODS), choices=BACKEND_METHODS)
+    parser.add_argument('--backend', default='numba', choices=BACKENDS[1:])
+    parser.add_argument('--steps', type=int, default=3650)
+    parser.add_argument('--step', type=float, default=86400, help='time step in seconds')
+    parser.add_argument('--tolerance', type=float, default=1e-9, help='largest relative difference allowed')
+    args = parser.parse_args(argv)
+
+    if resolveBackend(args.backend) == 'numpy':
+        print('%s is not available, nothing to check' % args.backend)
+        return 0
+
+    failed = False
+    for method in args.methods:
+        star, bodies = loadSystem(findSystem(args.system))
+        force = forceError(star, bodies, method, backend=args.backend)['max']
+        final = []
+        for backend in ('numpy', args.backend):
+            star, bodies = loadSystem(findSystem(args.system))
+            final.append(simulate(star, bodies, method, args.steps, args.step, args.steps, backend=backend).data[-1])
+        position = float(np.max(np.linalg.norm(final[1] - final[0], axis=-1) / np.linalg.norm(final[0], axis=-1)))
+        ok = force <= args.tolerance and position <= args.tolerance
+        failed = failed or not ok
+        print('%-10s force %.3g  position after %d steps %.3g  %s' % (method, force, args.steps, position, 'ok' if ok else 'FAILED'))
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import time
+
+from lib.scripts.euler import initialState
+from lib.scripts import profiling
+from lib.scripts.kernels import makeAcceleration, resolveBackend
+from lib.scripts.nbody import unpackBodies
+from lib.scripts.trajectory import Trajectory, reportSamples, bodyMeta
+
+
+def leapfrogStep(pos, vel, acc, accel, dt):
+
+    # Kick-drift-kick; acc holds the acceleration at the current positions on
+    # entry and is refreshed in place, so each step costs one force evaluation
+    vel += 0.5*dt*acc
+    pos += dt*vel
+    acc[...] = accel(pos)
+    vel += 0.5*dt*acc
+
+    return
+
+def main(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, backend='numpy'):
+    pos, vel, mass, star_pos, star_mass = initialState(star, bodies)
+    backend = resolveBackend(backend)
+    accel = makeAcceleration(mass, star_pos, star_mass, backend)
+    acc = accel(pos)
+    body_history = Trajectory(reportSamples(steps, report), pos.shape, store, bodyMeta(bodies, step=step, report=report), velocities)
+    body_history.record(pos, 0, vel)
+    force = profiling.timed('force', accel)
+    record = profiling.timed('record', body_history.record)
+
+    done = 0
+    for i in range(0, steps):
+        if progress is not None and progress(i, steps, body_history) == False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        leapfrogStep(pos, vel, acc, force, step)
+        if i % report == 0:
+            record(pos, (i + 1)*step, vel)
+        done = i + 1
+
+    unpackBodies(bodies, pos, vel)
+    body_history.finish(done*step, done < steps)
+
+    return body_history
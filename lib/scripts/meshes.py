@@ -0,0 +1,125 @@
+import os
+from collections import OrderedDict
+from math import radians, tan
+
+import pyqtgraph.opengl as gl
+from PyQt5.QtGui import QVector3D as Vector
+
+from lib.scripts.textures import loadTexture
+
+# Upper bound on the memory held by the shared mesh cache
+MESH_CACHE_BYTES = 512 * 2**20
+
+# Sphere resolutions (rows, cols) LODSphere picks from, coarsest first
+LOD_LEVELS = ((8, 12), (16, 24), (32, 48), (64, 96), (128, 192), (300, 400), (600, 800))
+# Mesh rows wanted per pixel of the sphere's diameter on screen
+LOD_ROWS_PER_PIXEL = 0.5
+
+
+class LRUCache:
+
+    # Least recently used cache bounded by the total size of its entries.
+    # The newest entry is always kept, even when it is over the budget alone
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+
+        return self.entries[key][0]
+
+    def put(self, key, value, size):
+
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+        return value
+
+    def clear(self):
+
+        self.entries.clear()
+        self.size = 0
+
+        return
+
+meshes = LRUCache(MESH_CACHE_BYTES)
+
+
+def textureKey(path):
+
+    # Keyed on the modification time too, so an edited texture is reloaded
+    return os.path.abspath(path), os.path.getmtime(path)
+
+def sphereMesh(rows, cols, texture=None):
+
+    # A unit sphere, colored by the texture at the given path when one is
+    # passed. MeshData is shared by every item that asks for the same sphere
+    # and must not be modified
+    key = (rows, cols) if texture is None else (rows, cols) + textureKey(texture)
+    mesh = meshes.get(key)
+    if mesh is not None:
+        return mesh
+
+    if texture is None:
+        mesh = gl.MeshData.sphere(rows=rows, cols=cols, radius=1)
+        size = mesh.vertexes().nbytes + mesh.faces().nbytes
+    else:
+        geometry = sphereMesh(rows, cols)
+        # Baked textures are memory-mapped, so a miss decodes the image once
+        # for every level rather than just this one
+        colors = loadTexture(texture, rows, cols, LOD_LEVELS)
+        mesh = gl.MeshData(vertexes=geometry.vertexes(), faces=geometry.faces())
+        mesh.setVertexColors(colors=colors)
+        size = mesh.vertexColors().nbytes
+
+    return meshes.put(key, mesh, size)
+
+
+class LODSphere(gl.GLMeshItem):
+
+    # Unit sphere that picks its mesh resolution from its size on screen
+    # each time it is drawn, so distant bodies cost a few hundred vertices.
+    # Every level comes from the shared mesh cache
+    def __init__(self, texture=None, max_level=LOD_LEVELS[-1], **kwds):
+        self.texture = texture
+        self.levels = [level for level in LOD_LEVELS if level <= max_level]
+        self.level = self.levels[0]
+        super(LODSphere, self).__init__(meshdata=sphereMesh(*self.level, texture=texture), **kwds)
+
+    def projectedSize(self):
+
+        # Diameter on screen in pixels
+        view = self.view()
+        transform = self.viewTransform()
+        center = transform.map(Vector(0, 0, 0))
+        radius = (transform.map(Vector(1, 0, 0)) - center).length()
+        distance = max((view.cameraPosition() - center).length(), radius)
+
+        return radius * view.height() / (distance * tan(radians(view.opts['fov']) / 2))
+
+    def pickLevel(self, pixels):
+
+        for level in self.levels:
+            if level[0] >= pixels * LOD_ROWS_PER_PIXEL:
+                return level
+
+        return self.levels[-1]
+
+    def paint(self):
+
+        level = self.pickLevel(self.projectedSize())
+        if level != self.level:
+            self.level = level
+            self.opts['meshdata'] = sphereMesh(*level, texture=self.texture)
+            self.meshDataChanged()
+        super(LODSphere, self).paint()
@@ -0,0 +1,65 @@
+import os
+
+import numba
+import numpy as np
+
+from lib.scripts.nbody import G
+
+# The GUI runs solvers on a QThread, and a TBB pool first started from a
+# thread other than the main one hangs the interpreter on exit
+if 'NUMBA_THREADING_LAYER' not in os.environ:
+    numba.config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+
+# Compiled on first use and cached on disk beside this file, so later runs
+# load the machine code instead of compiling again. The pair sums are
+# written out per body, which avoids the (N, N, 3) temporaries the NumPy
+# kernels build. Only imported through lib.scripts.kernels, and only when
+# the numba backend is picked, since importing numba alone takes seconds
+
+
+@numba.njit(cache=True)
+def bodyAcceleration(pos, mass, star_pos, star_mass, i):
+
+    x, y, z = pos[i, 0], pos[i, 1], pos[i, 2]
+    ax, ay, az = 0.0, 0.0, 0.0
+    for j in range(pos.shape[0]):
+        if j == i:
+            continue
+        dx, dy, dz = pos[j, 0] - x, pos[j, 1] - y, pos[j, 2] - z
+        dist_sq = dx*dx + dy*dy + dz*dz
+        a_scal = G * mass[j] / (dist_sq * np.sqrt(dist_sq))
+        ax += a_scal * dx
+        ay += a_scal * dy
+        az += a_scal * dz
+    dx, dy, dz = star_pos[0] - x, star_pos[1] - y, star_pos[2] - z
+    dist_sq = dx*dx + dy*dy + dz*dz
+    a_scal = G * star_mass / (dist_sq * np.sqrt(dist_sq))
+
+    return ax + a_scal * dx, ay + a_scal * dy, az + a_scal * dz
+
+@numba.njit(parallel=True, cache=True)
+def accelerationKernel(pos, mass, star_pos, star_mass, acc):
+
+    for i in numba.prange(pos.shape[0]):
+        acc[i, 0], acc[i, 1], acc[i, 2] = bodyAcceleration(pos, mass, star_pos, star_mass, i)
+
+    return
+
+@numba.njit(parallel=True, cache=True)
+def eulerKernel(pos, vel, mass, star_pos, star_mass, dt):
+
+    # One semi-implicit Euler step. Each body's force and velocity update
+    # share a pass; positions move in a second pass once every body has
+    # read the old ones
+    n = pos.shape[0]
+    for i in numba.prange(n):
+        ax, ay, az = bodyAcceleration(pos, mass, star_pos, star_mass, i)
+        vel[i, 0] += ax * dt
+        vel[i, 1] += ay * dt
+        vel[i, 2] += az * dt
+    for i in numba.prange(n):
+        pos[i, 0] += vel[i, 0] * dt
+        pos[i, 1] += vel[i, 1] * dt
+        pos[i, 2] += vel[i, 2] * dt
+
+    return
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lib.scripts.nbody import calcAcceleration
+
+# Per-worker state, filled in once by initWorker when the pool starts
+_worker = {}
+
+
+def initWorker(shm_name, n, mass, star_pos, star_mass):
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    state = np.ndarray((2, n, 3), dtype=np.float64, buffer=shm.buf)
+    _worker['shm'] = shm
+    _worker['pos'] = state[0]
+    _worker['acc'] = state[1]
+    _worker['mass'] = mass
+    _worker['star_pos'] = star_pos
+    _worker['star_mass'] = star_mass
+
+def computeRows(start, stop):
+
+    rows = slice(start, stop)
+    _worker['acc'][rows] = calcAcceleration(_worker['pos'], _worker['mass'], _worker['star_pos'], _worker['star_mass'], rows)
+
+    return
+
+class ForcePool:
+
+    # Splits the force evaluation by rows across a persistent process pool.
+    # Positions and accelerations live in one shared-memory block, and each
+    # worker always owns the same contiguous rows, so results do not depend on
+    # scheduling
+    def __init__(self, mass, star_pos, star_mass, workers=None):
+
+        n = len(mass)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, n))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 2*n*3*8))
+        state = np.ndarray((2, n, 3), dtype=np.float64, buffer=self.shm.buf)
+        self.pos = state[0]
+        self.acc = state[1]
+
+        bounds = np.linspace(0, n, self.workers + 1).astype(int)
+        self.chunks = [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+        # Workers are spawned rather than forked: the GUI starts the pool from
+        # its solver thread, and forking a threaded process can deadlock the
+        # child. They only need the block's name and the small arrays
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=initWorker,
+                                            initargs=(self.shm.name, n, np.asarray(mass), np.asarray(star_pos), star_mass))
+
+    def __call__(self, pos):
+
+        self.pos[...] = pos
+        futures = [self.executor.submit(computeRows, start, stop) for start, stop in self.chunks]
+        for future in futures:
+            future.result()
+
+        return self.acc.copy()
+
+    def close(self):
+
+        self.executor.shutdown()
+        self.pos = None
+        self.acc = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,137 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+# Per-phase wall-clock timers. Solvers wrap their hot callables with
+# timed() once per run, which hands the callable back untouched while
+# timing is off; methods decorated with phase() check one flag per call.
+# Phases can nest, e.g. 'force' runs inside 'solve'
+enabled = False
+tracing = False
+# Trace events kept at most, so a long traced run cannot exhaust memory
+MAX_TRACE_EVENTS = 2000000
+
+lock = threading.Lock()
+totals = {}
+events = []
+origin = time.perf_counter()
+
+
+def enable(trace=False):
+
+    global enabled, tracing
+    reset()
+    enabled = True
+    tracing = trace
+
+    return
+
+def disable():
+
+    global enabled, tracing
+    enabled = False
+    tracing = False
+
+    return
+
+def reset():
+
+    global origin
+    with lock:
+        totals.clear()
+        del events[:]
+        origin = time.perf_counter()
+
+    return
+
+def add(name, start, end):
+
+    with lock:
+        total = totals.setdefault(name, [0.0, 0])
+        total[0] += end - start
+        total[1] += 1
+        if tracing == True and len(events) < MAX_TRACE_EVENTS:
+            events.append((name, start, end, threading.get_ident()))
+
+    return
+
+def timed(name, func):
+
+    # func itself while timing is off, so the caller pays nothing for it
+    if enabled == False or func is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            add(name, start, time.perf_counter())
+
+    return wrapper
+
+def phase(name):
+
+    # Decorator that times every call made while timing is on
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if enabled == False:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+def summary(total='solve'):
+
+    # e.g. 'solve 2.31 s | force 1.90 s (82%) x1000 | record 0.05 s (2%) x1000'
+    with lock:
+        phases = sorted(totals.items(), key=lambda item: -item[1][0])
+    whole = totals.get(total, [0.0, 0])[0]
+    parts = []
+    for name, (seconds, calls) in phases:
+        if name == total or whole <= 0:
+            parts.append('%s %.3g s x%d' % (name, seconds, calls))
+        else:
+            parts.append('%s %.3g s (%d%%) x%d' % (name, seconds, 100 * seconds / whole, calls))
+
+    return ' | '.join(parts)
+
+def writeTrace(path):
+
+    # Chrome trace event format, which chrome://tracing and Perfetto open
+    with lock:
+        trace = [{'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': thread,
+                  'ts': (start - origin) * 1e6, 'dur': (end - start) * 1e6}
+                 for name, start, end, thread in events]
+        phases = {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in totals.items()}
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace, 'phases': phases}, f)
+
+    return
+
+def profiled(func, path=None, limit=25):
+
+    # Runs func() under cProfile and returns (result, report), where report
+    # lists the top functions by cumulative time. The raw stats are saved
+    # to path for snakeviz or pstats when given
+    profile = cProfile.Profile()
+    result = profile.runcall(func)
+    if path:
+        profile.dump_stats(path)
+    report = io.StringIO()
+    pstats.Stats(profile, stream=report).sort_stats('cumulative').print_stats(limit)
+
+    return result, report.getvalue()
@@ -0,0 +1,51 @@
+import time
+
+from lib.scripts.euler import initialState
+from lib.scripts import profiling
+from lib.scripts.kernels import makeAcceleration, resolveBackend
+from lib.scripts.nbody import unpackBodies
+from lib.scripts.trajectory import Trajectory, reportSamples, bodyMeta
+
+
+def rk4Step(pos, vel, accel, dt):
+
+    # Each stage evaluates the whole system at once; the x stages are velocities
+    # and the v stages are accelerations
+    k1x = vel
+    k1v = accel(pos)
+    k2x = vel + 0.5*dt*k1v
+    k2v = accel(pos + 0.5*dt*k1x)
+    k3x = vel + 0.5*dt*k2v
+    k3v = accel(pos + 0.5*dt*k2x)
+    k4x = vel + dt*k3v
+    k4v = accel(pos + dt*k3x)
+
+    pos += dt/6 * (k1x + 2*k2x + 2*k3x + k4x)
+    vel += dt/6 * (k1v + 2*k2v + 2*k3v + k4v)
+
+    return
+
+def main(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, backend='numpy'):
+    pos, vel, mass, star_pos, star_mass = initialState(star, bodies)
+    backend = resolveBackend(backend)
+    accel = makeAcceleration(mass, star_pos, star_mass, backend)
+    body_history = Trajectory(reportSamples(steps, report), pos.shape, store, bodyMeta(bodies, step=step, report=report), velocities)
+    body_history.record(pos, 0, vel)
+    force = profiling.timed('force', accel)
+    record = profiling.timed('record', body_history.record)
+
+    done = 0
+    for i in range(0, steps):
+        if progress is not None and progress(i, steps, body_history) == False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        rk4Step(pos, vel, force, step)
+        if i % report == 0:
+            record(pos, (i + 1)*step, vel)
+        done = i + 1
+
+    unpackBodies(bodies, pos, vel)
+    body_history.finish(done*step, done < steps)
+
+    return body_history
@@ -0,0 +1,121 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from lib.scripts import profiling
+from lib.scripts.bodies import findSystem, loadSystem
+from lib.scripts.kernels import BACKENDS
+from lib.scripts.simulation import BACKEND_METHODS, METHODS, simulate, forceError
+
+
+def parseArgs(argv=None):
+
+    parser = argparse.ArgumentParser(description='Run an orbit simulation without the GUI.')
+    parser.add_argument('--system', default='Solar System.csv', help='system preset name or path to a system csv')
+    parser.add_argument('--method', default='euler', choices=sorted(METHODS))
+    parser.add_argument('--steps', type=int, default=365)
+    parser.add_argument('--step', type=float, default=86400, help='time step in seconds')
+    parser.add_argument('--report', type=int, default=1, help='record a sample every REPORT steps')
+    parser.add_argument('--out', help='.npz to save the run to, or .npy to stream it to disk while solving')
+    parser.add_argument('--multiprocess', action='store_true', help='euler only: use the process-pool force engine')
+    parser.add_argument('--theta', type=float, default=0.5, help='barnes-hut opening angle')
+    parser.add_argument('--rtol', type=float, default=1e-9, help='dopri relative tolerance')
+    parser.add_argument('--atol', type=float, default=1e-3, help='dopri absolute tolerance')
+    parser.add_argument('--backend', default='numpy', choices=BACKENDS,
+                        help='euler, rk4, leapfrog and dopri: force kernels to use; numba falls back to numpy when missing')
+    parser.add_argument('--max-time', type=float, help='wall-clock budget in seconds; the run is truncated when it runs out')
+    parser.add_argument('--velocities', action='store_true', help='record velocities as well as positions')
+    parser.add_argument('--force-error', action='store_true',
+                        help='before the run, compare barnes-hut or compiled kernel forces against the numpy direct sum on a sample of bodies')
+    parser.add_argument('--profile', action='store_true', help='time each solver phase and print a summary')
+    parser.add_argument('--trace', help='json file to write a per-call phase trace to (chrome://tracing format)')
+    parser.add_argument('--cprofile', help='run under cProfile, print the top functions and save the stats here')
+    parser.add_argument('--quiet', action='store_true')
+
+    return parser.parse_args(argv)
+
+def methodOptions(args):
+
+    options = {}
+    if args.method in BACKEND_METHODS:
+        options['backend'] = args.backend
+    if args.method == 'euler':
+        options['multiprocess'] = args.multiprocess
+    if args.method == 'barnes-hut':
+        options['theta'] = args.theta
+    if args.method == 'dopri':
+        options.update(rtol=args.rtol, atol=args.atol)
+
+    return options
+
+def printProgress():
+
+    last = [-1]
+
+    def progress(i, total, trajectory):
+        percent = 100 * i // max(total, 1)
+        if percent != last[0]:
+            last[0] = percent
+            sys.stderr.write('\r%3d%%' % percent)
+            sys.stderr.flush()
+
+    return progress
+
+def main(argv=None):
+
+    args = parseArgs(argv)
+    star, bodies = loadSystem(findSystem(args.system))
+
+    store = args.out if args.out and args.out.endswith('.npy') else None
+    progress = None if args.quiet else printProgress()
+
+    if args.force_error == True:
+        error = forceError(star, bodies, args.method, **methodOptions(args))
+        if error is None:
+            sys.stderr.write('%s uses the numpy direct sum, there is no force error to report\n' % args.method)
+        else:
+            sys.stderr.write('Force error: median %.3g, p99 %.3g, max %.3g\n' % (error['median'], error['p99'], error['max']))
+
+    if args.profile == True or args.trace:
+        profiling.enable(trace=bool(args.trace))
+
+    def run():
+        return simulate(star, bodies, args.method, args.steps, args.step, args.report, store=store,
+                        progress=progress, max_time=args.max_time, velocities=args.velocities, **methodOptions(args))
+
+    start = time.perf_counter()
+    if args.cprofile:
+        results, report = profiling.profiled(run, args.cprofile)
+    else:
+        results = run()
+    elapsed = time.perf_counter() - start
+    profiling.disable()
+
+    if not args.quiet:
+        sys.stderr.write('\r%d samples of %d bodies in %.2f s\n' % (results.count, len(results), elapsed))
+        if 'accepted' in results.meta:
+            sys.stderr.write('Accepted steps: %d, rejected steps: %d\n' % (results.meta['accepted'], results.meta['rejected']))
+        if results.truncated:
+            sys.stderr.write('Truncated at t = %.6g s of %.6g s\n' % (results.t_reached, args.steps*args.step))
+        if args.profile == True or args.trace:
+            sys.stderr.write(profiling.summary() + '\n')
+        if args.cprofile:
+            sys.stderr.write(report)
+
+    if args.trace:
+        profiling.writeTrace(args.trace)
+
+    if args.out and store is None:
+        columns = {'positions': results.data, 'times': results.time}
+        if results.velocities is not None:
+            columns['velocities'] = results.velocity
+        np.savez(args.out, names=np.array([body.name for body in bodies]),
+                 step=args.step, report=args.report, method=args.method,
+                 t_reached=results.t_reached, truncated=results.truncated, **columns)
+
+    return results
+
+if __name__ == '__main__':
+    main()
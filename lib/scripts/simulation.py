@@ -0,0 +1,84 @@
+import time
+
+from lib.scripts import euler, rk4, leapfrog, dopri, sphere_influence, profiling, barnes_hut
+from lib.scripts.kernels import kernelError, resolveBackend
+
+
+def runEuler(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, multiprocess=False,
+             backend='numpy'):
+    return euler.main(star, bodies, steps, step, report, int(multiprocess), store=store, progress=progress, deadline=deadline,
+                      velocities=velocities, backend=backend)
+
+def runBarnesHut(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, theta=0.5):
+    return euler.main(star, bodies, steps, step, report, 0, theta, store=store, progress=progress, deadline=deadline, velocities=velocities)
+
+def runRK4(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, backend='numpy'):
+    return rk4.main(star, bodies, steps, step, report, store=store, progress=progress, deadline=deadline, velocities=velocities,
+                    backend=backend)
+
+def runLeapfrog(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, backend='numpy'):
+    return leapfrog.main(star, bodies, steps, step, report, store=store, progress=progress, deadline=deadline, velocities=velocities,
+                         backend=backend)
+
+def runDopri(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False, rtol=1e-9, atol=1e-3,
+             backend='numpy'):
+    return dopri.main(star, bodies, steps, step, report, rtol, atol, store=store, progress=progress, deadline=deadline,
+                      velocities=velocities, backend=backend)
+
+def runSOI(star, bodies, steps, step, report, store=None, progress=None, deadline=None, velocities=False):
+    return sphere_influence.main(star, bodies, steps, step, report, store=store, progress=progress, deadline=deadline, velocities=velocities)
+
+# Methods whose forces can run on a compiled backend
+BACKEND_METHODS = ('euler', 'rk4', 'leapfrog', 'dopri')
+
+METHODS = {
+    'euler': runEuler,
+    'rk4': runRK4,
+    'leapfrog': runLeapfrog,
+    'dopri': runDopri,
+    'barnes-hut': runBarnesHut,
+    'soi': runSOI,
+}
+
+
+def simulate(star, bodies, method='euler', steps=100, step=86400, report=1, store=None, progress=None, max_time=None,
+             velocities=False, **options):
+
+    # Qt-free entry point shared by the GUI and the command line. bodies is a
+    # list of Body objects, which get the final state written back, or
+    # BodyRegistry.columns(), which skips the objects altogether. progress is
+    # called as progress(step_index, steps, trajectory) and may return False
+    # to cancel; samples below trajectory.count are final and safe to read.
+    # max_time is a wall-clock budget in seconds; when it runs out the run
+    # stops and the result is marked truncated. velocities=True records the
+    # velocities alongside the positions. options are passed on to the
+    # method (multiprocess, theta, rtol, atol, and backend for the direct
+    # summation methods, see lib.scripts.kernels). With lib.scripts.profiling
+    # enabled the run is timed as 'solve' and the progress calls as 'progress'
+    if method not in METHODS:
+        raise ValueError("Unknown method '%s', expected one of %s" % (method, ', '.join(METHODS)))
+
+    deadline = None if max_time is None else time.perf_counter() + max_time
+
+    run = profiling.timed('solve', METHODS[method])
+    progress = profiling.timed('progress', progress)
+
+    return run(star, bodies, steps, step, report, store=store, progress=progress, deadline=deadline,
+               velocities=velocities, **options)
+
+def forceError(star, bodies, method, samples=1000, **options):
+
+    # Relative error of the method's forces on the system's initial state,
+    # on a sample of bodies, as {'median', 'p99', 'max'}: Barnes-Hut against
+    # direct summation, and a compiled backend against the NumPy kernels.
+    # None when the method already uses the NumPy direct sum. This costs a
+    # samples x N direct sum, so it is run on request and not as part of
+    # every solve
+    pos, vel, mass, star_pos, star_mass = euler.initialState(star, bodies)
+    if method == 'barnes-hut':
+        return barnes_hut.forceError(pos, mass, options.get('theta', 0.5), samples)
+    backend = options.get('backend', 'numpy')
+    if method in BACKEND_METHODS and options.get('multiprocess', False) == False and resolveBackend(backend) != 'numpy':
+        return kernelError(pos, mass, star_pos, star_mass, backend, samples)
+
+    return None
@@ -1,100 +1,159 @@
+import time
+
 import numpy as np
-from math import sqrt
 
-G = 6.674e-11
+from lib.scripts import profiling
+from lib.scripts.euler import initialState
+from lib.scripts.nbody import unpackBodies
+from lib.scripts.trajectory import Trajectory, reportSamples, bodyMeta
 
+G = 6.674e-11
 
-def calcSOI(star, bodies):
-    for body in bodies:
+# Below this many bodies parents are found by testing every pair at once,
+# which beats building the index
+BRUTE_FORCE_BODIES = 256
 
-        body.soi = body.sma*1000*(body.mass/star.mass)**(2/5)
+# Spreads the three cell coordinates over a single hash key
+CELL_HASH = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+# Corners of the 2x2x2 block of cells a sphere's bounding box can touch
+CORNERS = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)], dtype=np.int64)
 
-def convertUnits(bodies):
 
+def calcSOI(star, bodies):
     for body in bodies:
-        body.x = 0
-        body.y = body.sma * 1000 * np.cos(np.deg2rad(body.inc))
-        body.z = body.sma * 1000 * np.sin(np.deg2rad(body.inc))
-        body.vx = body.vel * 1000
-        body.vy = 0
-        body.vz = 0
-
-    return
 
-def checkDistance(star, bodies):
+        body.soi = body.sma*1000*(body.mass/star.mass)**(2/5)
 
-    for body in bodies:
-        for other_body in bodies:
-            if body == other_body:
+def cellKeys(cells):
+
+    # Cells that hash alike share a key; the exact distance test afterwards
+    # throws out whatever a collision lets in
+    return np.bitwise_xor.reduce(cells * CELL_HASH, axis=-1)
+
+
+class SOIIndex:
+
+    # Spatial hash over spheres of influence. Spheres are grouped by size
+    # into power-of-two classes, each with a grid of cells at least as wide
+    # as the spheres' diameter, so a sphere touches at most 2x2x2 cells of
+    # its class and a point only needs looking up in one cell per class
+    def __init__(self, centres, radii):
+        self.classes = []
+        spheres = np.flatnonzero(radii > 0)
+        if len(spheres) == 0:
+            return
+        levels = np.ceil(np.log2(2 * radii[spheres])).astype(np.int64)
+        for level in np.unique(levels):
+            members = spheres[levels == level]
+            size = 2.0 ** level
+            low = np.floor((centres[members] - radii[members, np.newaxis]) / size).astype(np.int64)
+            keys = cellKeys(low[:, np.newaxis, :] + CORNERS).ravel()
+            owners = np.repeat(members, len(CORNERS))
+            order = np.argsort(keys, kind='stable')
+            self.classes.append((size, keys[order], owners[order]))
+
+    def candidates(self, points):
+
+        # (point, sphere) index pairs for every sphere whose cells hold the
+        # point; a superset of the spheres actually containing it
+        found_points, found_spheres = [], []
+        for size, keys, owners in self.classes:
+            query = cellKeys(np.floor(points / size).astype(np.int64))
+            # Searching with sorted keys walks the table in order, which is
+            # several times faster than hashed keys in point order
+            order = np.argsort(query)
+            query = query[order]
+            start = np.searchsorted(keys, query, side='left')
+            counts = np.searchsorted(keys, query, side='right') - start
+            total = counts.sum()
+            if total == 0:
                 continue
-
-            dist = (other_body.x - body.x)**2 + (other_body.y - body.y)**2 + (other_body.z-body.z)**2
-            dist = sqrt(dist)
-
-            if dist < other_body.soi:
-                body.parent = other_body
-            if dist > other_body.soi:
-                body.parent = star
-
-    return
-
-def calcAcceleration(star, bodies, time_step):
-
-    X, Y, Z = 0, 1, 2
-
-    for body in bodies:
-        a = [0,0,0]
-
-        dist = (body.parent.x - body.x)**2 + (body.parent.y - body.y)**2 + (body.parent.z - body.z)**2
-        dist = sqrt(dist)
-
-        a_scal = G * body.parent.mass / dist**3
-        a[X] += a_scal * (body.parent.x - body.x)
-        a[Y] += a_scal * (body.parent.y - body.y)
-        a[Z] += a_scal * (body.parent.z - body.z)
-
-        body.vx += a[X] * time_step
-        body.vy += a[Y] * time_step
-        body.vz += a[Z] * time_step
-
-        body.x += body.vx * time_step
-        body.y += body.vy * time_step
-        body.z += body.vz * time_step
-
-    return
-
-def reportPosition(bodies, body_history):
-
-    if not body_history:
-        for body in bodies:
-            body_history.append([[body.x, body.y, body.z]])
-
-    for i, body in enumerate(bodies):
-        body_history[i].append([body.x, body.y, body.z])
-
-    return
-
-def main(star, bodies, steps, time_step, report):
-
-    body_history = []
-
-    calcSOI(star, bodies)
-    convertUnits(bodies)
-    checkDistance(star, bodies)
-
-    reportPosition(bodies, body_history)
-
+            hits = np.repeat(np.arange(len(points)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            found_points.append(order[hits])
+            found_spheres.append(owners[start[hits] + offsets])
+
+        if not found_points:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        return np.concatenate(found_points), np.concatenate(found_spheres)
+
+def assignParents(pos, mass, soi):
+
+    # Index of each body's parent, or -1 for the star: the innermost sphere
+    # of influence of a heavier body that contains it. Innermost first is
+    # what nests star -> planet -> moon, since a moon's sphere lies inside
+    # its planet's
+    n = len(pos)
+    if n <= BRUTE_FORCE_BODIES:
+        bodies, spheres = np.nonzero(np.ones((n, n), dtype=bool))
+    else:
+        bodies, spheres = SOIIndex(pos, soi).candidates(pos)
+
+    sep = pos[spheres] - pos[bodies]
+    inside = ((np.einsum('ij,ij->i', sep, sep) < soi[spheres]**2) & (spheres != bodies)
+              & (mass[spheres] > mass[bodies]))
+    bodies, spheres = bodies[inside], spheres[inside]
+
+    # Smallest containing sphere per body
+    order = np.lexsort((soi[spheres], bodies))
+    bodies, spheres = bodies[order], spheres[order]
+    first = np.ones(len(bodies), dtype=bool)
+    first[1:] = bodies[1:] != bodies[:-1]
+    parents = np.full(n, -1, dtype=np.int64)
+    parents[bodies[first]] = spheres[first]
+
+    return parents
+
+def calcAcceleration(pos, parents, mass, star_pos, star_mass):
+
+    # Each body feels its parent only
+    has_parent = parents >= 0
+    parent_pos = np.where(has_parent[:, np.newaxis], pos[parents], star_pos)
+    parent_mass = np.where(has_parent, mass[parents], star_mass)
+    sep = parent_pos - pos
+    dist_sq = np.einsum('ij,ij->i', sep, sep)
+
+    return (G * parent_mass * dist_sq**-1.5)[:, np.newaxis] * sep
+
+def main(star, bodies, steps, time_step, report, store=None, progress=None, deadline=None, velocities=False):
+
+    pos, vel, mass, star_pos, star_mass = initialState(star, bodies)
+    if isinstance(bodies, dict):
+        soi = np.asarray(bodies['sma'], dtype=np.float64) * 1000 * (mass / star.mass)**(2/5)
+    else:
+        calcSOI(star, bodies)
+        soi = np.array([body.soi for body in bodies], dtype=np.float64)
+    body_history = Trajectory(reportSamples(steps, report), pos.shape, store, bodyMeta(bodies, step=time_step, report=report), velocities)
+    parents = assignParents(pos, mass, soi)
+
+    body_history.record(pos, 0, vel)
+    assign = profiling.timed('soi', assignParents)
+    accelerate = profiling.timed('force', calcAcceleration)
+    record = profiling.timed('record', body_history.record)
+
+    done = 0
     for i in range(0, steps):
 
-        calcAcceleration(star, bodies, time_step)
-
-        if i % report == 0:
+        if progress is not None and progress(i, steps, body_history) == False:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
 
-            reportPosition(bodies, body_history)
-            checkDistance(star, bodies)
-
-    return body_history
+        # Parents are reassigned from the positions at the start of every step
+        parents = assign(pos, mass, soi)
+        vel += accelerate(pos, parents, mass, star_pos, star_mass) * time_step
+        pos += vel * time_step
 
+        if i % report == 0:
+            record(pos, (i + 1)*time_step, vel)
 
+        done = i + 1
 
+    unpackBodies(bodies, pos, vel)
+    if not isinstance(bodies, dict):
+        for body, parent in zip(bodies, parents.tolist()):
+            body.parent = star if parent < 0 else bodies[parent]
+    body_history.finish(done*time_step, done < steps)
 
+    return body_history
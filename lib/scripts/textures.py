@@ -0,0 +1,105 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+TEXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'assets', 'textures')
+# Baked textures live in a folder of this name beside their source image
+BAKED_FOLDER = 'baked'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def decodeTexture(path):
+
+    # Only decoding source images needs matplotlib, so it is imported here
+    # rather than whenever a texture is loaded
+    from matplotlib.pyplot import imread
+
+    image = imread(path)
+    # jpgs decode to 0-255 integers, pngs to 0-1 floats
+    if np.issubdtype(image.dtype, np.integer):
+        image = image / 255
+    if image.ndim == 2:
+        image = np.dstack((image, image, image))
+    colors = np.ones(image.shape[:2] + (4,), dtype=np.float32)
+    colors[..., :image.shape[2]] = image[..., :4]
+
+    return colors
+
+def sampleTexture(colors, rows, cols):
+
+    # Nearest-neighbour resample to one color per row and column of the sphere
+    if colors.shape[:2] == (rows, cols):
+        return colors
+    row = np.arange(rows) * colors.shape[0] // rows
+    col = np.arange(cols) * colors.shape[1] // cols
+
+    return colors[row[:, None], col]
+
+def bakedPath(path, rows, cols):
+
+    # e.g. planets/earth.jpg at 300x400 -> planets/baked/earth.jpg.300x400.npy
+    folder, name = os.path.split(path)
+    return os.path.join(folder, BAKED_FOLDER, '%s.%dx%d.npy' % (name, rows, cols))
+
+def isBaked(path, rows, cols):
+
+    baked = bakedPath(path, rows, cols)
+    return os.path.exists(baked) and os.path.getmtime(baked) >= os.path.getmtime(path)
+
+def bakeTexture(path, levels):
+
+    # Decodes the image once and writes a (rows, cols, 4) float32 copy in
+    # 0-1 for every level. Returns the levels in memory so callers can use
+    # them even when the texture folder is read-only
+    colors = decodeTexture(path)
+    baked = {}
+    for rows, cols in levels:
+        baked[(rows, cols)] = np.ascontiguousarray(sampleTexture(colors, rows, cols))
+        try:
+            os.makedirs(os.path.dirname(bakedPath(path, rows, cols)), exist_ok=True)
+            np.save(bakedPath(path, rows, cols), baked[(rows, cols)])
+        except OSError as e:
+            print(e)
+
+    return baked
+
+def loadTexture(path, rows, cols, levels=None):
+
+    # Memory-maps the baked (rows, cols, 4) colors for an image. A missing
+    # or stale bake is redone first, for all of levels at once when given
+    if isBaked(path, rows, cols):
+        return np.load(bakedPath(path, rows, cols), mmap_mode='r')
+
+    levels = set(levels or ()) | {(rows, cols)}
+    colors = bakeTexture(path, levels)[(rows, cols)]
+    colors.flags.writeable = False
+
+    return colors
+
+def findTextures(folder=TEXTURES_PATH):
+
+    return sorted(path for path in glob.glob(os.path.join(folder, '**', '*'), recursive=True)
+                  if path.lower().endswith(SOURCE_EXTENSIONS) and BAKED_FOLDER not in path.split(os.sep))
+
+def main(argv=None):
+
+    # python -m lib.scripts.textures bakes every texture for every mesh level
+    from lib.scripts.meshes import LOD_LEVELS
+
+    parser = argparse.ArgumentParser(description='Bake textures into memory-mappable .npy files for each mesh resolution.')
+    parser.add_argument('folder', nargs='?', default=TEXTURES_PATH)
+    parser.add_argument('--force', action='store_true', help='rebake textures that are already up to date')
+    args = parser.parse_args(argv)
+
+    for path in findTextures(args.folder):
+        if args.force == False and all(isBaked(path, rows, cols) for rows, cols in LOD_LEVELS):
+            continue
+        bakeTexture(path, LOD_LEVELS)
+        print('Baked', os.path.relpath(path, args.folder))
+
+    return
+
+if __name__ == '__main__':
+    main()
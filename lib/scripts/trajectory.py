@@ -0,0 +1,180 @@
+import json
+import os
+
+import numpy as np
+
+# Samples written between flushes of an on-disk trajectory
+CHUNK = 1024
+
+
+def reportSamples(steps, report):
+
+    # The initial state plus one sample for every step i with i % report == 0
+    return 1 + -(-steps // report)
+
+def metaPath(path):
+    return os.path.splitext(path)[0] + '.json'
+
+def sidePath(path, name):
+
+    # Arrays stored beside a trajectory, e.g. run.npy -> run.times.npy
+    return os.path.splitext(path)[0] + '.' + name + '.npy'
+
+def sampleTimes(samples, step, report):
+
+    # Time of each sample of a run recorded every report steps of size step,
+    # for stored runs that predate the time axis
+    times = (np.arange(samples, dtype=np.float64) - 1) * report * step + step
+    times[:1] = 0
+
+    return times
+
+def bodyMeta(bodies, **extra):
+
+    # bodies is a list of Body objects, or BodyRegistry.columns()
+    if isinstance(bodies, dict):
+        meta = {'names': list(bodies['name'])}
+        colors = list(bodies['color'])
+    else:
+        meta = {'names': [body.name for body in bodies]}
+        colors = [getattr(body, 'color', None) for body in bodies]
+    if all(color is not None for color in colors):
+        meta['colors'] = [list(color) for color in colors]
+    meta.update(extra)
+
+    return meta
+
+class Trajectory:
+
+    # Result of a run, stored by column: preallocated (samples, ..., N, 3)
+    # positions, the time of each sample, optionally the velocities, and
+    # the body names/colors and run settings in meta. Indexing by body
+    # returns a strided view of that body's track, so trajectory[body][-1]
+    # and trajectory[body][:, 0] work without copying. Given a path, the
+    # columns are .npy memmaps flushed every CHUNK samples, with the sample
+    # count and metadata in a .json file beside them
+    def __init__(self, samples, shape, path=None, meta=None, velocities=False):
+        self.path = path
+        self.meta = dict(meta or {})
+        self.count = 0
+        self.positions = self.allocate(samples, tuple(shape), None)
+        self.times = self.allocate(samples, (), 'times')
+        self.velocities = self.allocate(samples, tuple(shape), 'velocities') if velocities == True else None
+        self.flush()
+
+    def allocate(self, samples, shape, name):
+
+        if self.path is None:
+            return np.empty((samples,) + shape, dtype=np.float64)
+        path = self.path if name is None else sidePath(self.path, name)
+
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(samples,) + shape)
+
+    @classmethod
+    def open(cls, path):
+
+        # Lazily maps a stored run; nothing is read until it is indexed
+        trajectory = cls.__new__(cls)
+        trajectory.path = path
+        trajectory.positions = np.load(path, mmap_mode='r')
+        trajectory.meta = {}
+        trajectory.count = len(trajectory.positions)
+        if os.path.exists(metaPath(path)):
+            with open(metaPath(path), 'r') as f:
+                trajectory.meta = json.load(f)
+            trajectory.count = trajectory.meta.pop('count', trajectory.count)
+
+        trajectory.times = None
+        trajectory.velocities = None
+        if os.path.exists(sidePath(path, 'times')):
+            trajectory.times = np.load(sidePath(path, 'times'), mmap_mode='r')
+        elif 'step' in trajectory.meta and 'report' in trajectory.meta:
+            trajectory.times = sampleTimes(len(trajectory.positions), trajectory.meta['step'], trajectory.meta['report'])
+        if os.path.exists(sidePath(path, 'velocities')):
+            trajectory.velocities = np.load(sidePath(path, 'velocities'), mmap_mode='r')
+
+        return trajectory
+
+    def record(self, pos, t, vel=None):
+
+        self.positions[self.count] = pos
+        self.times[self.count] = t
+        if self.velocities is not None:
+            self.velocities[self.count] = vel
+        self.count += 1
+        if self.path is not None and self.count % CHUNK == 0:
+            self.flush()
+
+        return
+
+    def flush(self):
+
+        if self.path is None:
+            return
+        for column in (self.positions, self.times, self.velocities):
+            if isinstance(column, np.memmap) and column.mode != 'r':
+                column.flush()
+        with open(metaPath(self.path), 'w') as f:
+            json.dump(dict(self.meta, count=self.count), f)
+
+        return
+
+    def finish(self, t_reached, truncated=False, **extra):
+
+        # Records how far the run got; truncated runs stopped early because
+        # they were cancelled or ran out of solve time
+        self.meta.update(extra)
+        self.meta['t_reached'] = float(t_reached)
+        self.meta['truncated'] = bool(truncated)
+        self.flush()
+
+        return
+
+    @property
+    def truncated(self):
+        return self.meta.get('truncated', False)
+
+    @property
+    def t_reached(self):
+        return self.meta.get('t_reached')
+
+    @property
+    def data(self):
+        return self.positions[:self.count]
+
+    @property
+    def time(self):
+        return None if self.times is None else self.times[:self.count]
+
+    @property
+    def velocity(self):
+        return None if self.velocities is None else self.velocities[:self.count]
+
+    @property
+    def final(self):
+
+        # (..., N, 3) positions of the last sample
+        return self.positions[self.count - 1]
+
+    def __len__(self):
+        return self.positions.shape[-2]
+
+    def __getitem__(self, body):
+        return self.positions[:self.count, ..., body, :]
+
+    def __iter__(self):
+        for body in range(len(self)):
+            yield self[body]
+
+    def variant(self, index):
+
+        # For ensemble runs, the trajectory of a single variant as a view
+        view = Trajectory.__new__(Trajectory)
+        view.path = None
+        view.meta = self.meta
+        view.positions = self.positions[:, index]
+        view.times = self.times
+        view.velocities = None if self.velocities is None else self.velocities[:, index]
+        view.count = self.count
+
+        return view
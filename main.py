@@ -1,36 +1,53 @@
-import csv
-import glob
+import time
+STARTED = time.perf_counter()
+
+import copy
 import os
 import sys
 from random import random
 
-from matplotlib.pyplot import imread
-
 import pyqtgraph as pyqtg
-import pyqtgraph.opengl as gl
 from PyQt5 import QtWidgets
-from PyQt5.QtGui import QPixmap, QIcon, QColor
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, QThread, Qt, pyqtSignal
+from PyQt5.QtGui import QPixmap, QColor
 from PyQt5.QtGui import QVector3D as Vector
-from numpy import array
 from numpy import max
 
+# pyqtgraph.opengl, the dialogs and the solvers are imported where they are
+# first used so the window comes up without them; see --profile-startup
 import lib.assets.gui.mainWindow as mainWindow
-from lib.assets.gui.bodyWidget import Ui_bodyForm as bodyWidget
-from lib.assets.gui.starWidget import Ui_starPresetDialog as starWidget
-from lib.scripts.euler import main as Euler
-from lib.scripts.sphere_influence import main as SOI
+from lib.scripts import profiling
+from lib.scripts.bodies import Body, BodyRegistry, Star, SYSTEM_PRESETS_PATH, loadSystem
+from lib.scripts.catalog import BODY_PRESETS_PATH, STAR_PRESETS_PATH, loadCatalog, loadStarData, presetFiles
+from lib.scripts.decimate import Pyramid, gapped
+from lib.scripts.trajectory import Trajectory
 
-star_preset_path = './lib/presets/stars/star_presets.csv'
 star_textures_path = './lib/assets/textures/stars/'
 planet_textures_path = './lib/assets/textures/planets/'
-body_preset_path = './lib/presets/bodies/body_presets.csv'
 
 SECS_MINUTE = 60
 SECS_DAY = 86400
 SECS_YEAR = 86400*365
 AU = 1.496e+8
 
+# Minimum time between progress updates posted by the solver thread (20 Hz)
+PROGRESS_INTERVAL = 0.05
+# Minimum time between trajectory chunks drawn while the solver runs (4 Hz)
+PUBLISH_INTERVAL = 0.25
+
+# Points fed to each XY curve per pixel of plot width, and to each 3D line
+XY_POINTS_PER_PIXEL = 4
+GL_LINE_POINTS = 20000
+
+SOLUTION_METHODS = {
+    "Euler Integration": 'euler',
+    "Sphere of Influence": 'soi',
+    "Runge-Kutta 4": 'rk4',
+    "Leapfrog (Symplectic)": 'leapfrog',
+    "Dormand-Prince 5(4) (Adaptive)": 'dopri',
+    "Barnes-Hut Tree (Euler)": 'barnes-hut',
+}
+
 def my_exception_hook(exctype, value, traceback):
     # Print the error and traceback
     print(exctype, value, traceback)
@@ -38,51 +55,190 @@ def my_exception_hook(exctype, value, traceback):
     sys.excepthook(exctype, value, traceback)
     sys.exit(1)
 
-class Body:
-    def __init__(self, name, mass, radius, sma, vel, inc):
-        self.name = name
-        self.color = None
-        self.mass = mass
-        self.radius = radius
-        self.sma = sma
-        self.vel = vel
-        self.inc = inc
-        self.x = None
-        self.y = None
-        self.z = None
-        self.ax = 0
-        self.ay = 0
-        self.az = 0
-        self.vx = None
-        self.vy = None
-        self.vz = None
-        self.soi = None
-        self.parent = None
-
-class Star:
-    def __init__(self, name, mass, radius):
-        self.name = name
-        self.mass = mass
-        self.radius = radius
-        self.x = 0
-        self.y = 0
-        self.z = 0
-        self.soi = None
+
+class SolverWorker(QObject):
+
+    progressed = pyqtSignal(int)
+    published = pyqtSignal(object, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, star, bodies, method, steps, step, report, store, options, cprofile=None):
+        super(SolverWorker, self).__init__()
+
+        # bodies is a BodyRegistry.columns() snapshot, so the window can keep
+        # using (and editing) the bodies while it runs
+        self.star = copy.deepcopy(star)
+        self.bodies = bodies
+        self.method = method
+        self.steps = steps
+        self.step = step
+        self.report = report
+        self.store = store
+        self.options = options
+        self.cprofile = cprofile
+        self.cancelled = False
+        self.last_update = 0
+        self.last_publish = 0
+        self.published_count = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def updateProgress(self, i, total, trajectory):
+
+        now = time.perf_counter()
+        if now - self.last_update >= PROGRESS_INTERVAL:
+            self.last_update = now
+            self.progressed.emit(i)
+        # Samples below trajectory.count are final, so the window can draw
+        # them straight from the solver's buffer while the rest is filled in
+        if now - self.last_publish >= PUBLISH_INTERVAL and trajectory.count > self.published_count:
+            self.last_publish = now
+            self.published_count = trajectory.count
+            self.published.emit(trajectory, trajectory.count)
+
+        return not self.cancelled
+
+    def run(self):
+
+        from lib.scripts.simulation import simulate
+
+        def solve():
+            return simulate(self.star, self.bodies, self.method, self.steps, self.step, self.report,
+                            store=self.store, progress=self.updateProgress, **self.options)
+
+        try:
+            if self.cprofile is not None:
+                # Only this thread is profiled, so the stats are the solver's;
+                # the window points at the saved file rather than the report
+                results = profiling.profiled(solve, self.cprofile)[0]
+            else:
+                results = solve()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        self.finished.emit(results)
+
+
+class CatalogModel(QAbstractListModel):
+
+    # List model over one column of a catalog showing only the given rows,
+    # so filtering a large catalog never builds an item per entry
+    def __init__(self, catalog, column='name', parent=None):
+        super(CatalogModel, self).__init__(parent)
+        self.catalog = catalog
+        self.column = catalog[column]
+        self.rows = list(range(len(catalog)))
+
+    def rowCount(self, parent=None):
+        return len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return str(self.column[self.rows[index.row()]])
+        return None
+
+    def setRows(self, rows):
+
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+        return
+
+    def catalogRow(self, index):
+        return self.rows[index]
+
+
+class BodyListModel(QAbstractListModel):
+
+    # List model over a BodyRegistry that keeps each row's body id, so an
+    # edit or removal updates that one row instead of rebuilding the list
+    def __init__(self, registry, parent=None):
+        super(BodyListModel, self).__init__(parent)
+        self.registry = registry
+        self.ids = registry.ids()
+
+    def rowCount(self, parent=None):
+        return len(self.ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        body = self.registry.get(self.ids[index.row()])
+        if role == Qt.DisplayRole:
+            return body.name
+        if role == Qt.DecorationRole and body.color is not None:
+            return QColor.fromRgbF(*body.color[:3])
+        if role == Qt.UserRole:
+            return body.id
+        return None
+
+    def bodyId(self, row):
+        return self.ids[row]
+
+    def reload(self):
+
+        self.beginResetModel()
+        self.ids = self.registry.ids()
+        self.endResetModel()
+
+        return
+
+    def appendBody(self, body_id):
+
+        self.beginInsertRows(QModelIndex(), len(self.ids), len(self.ids))
+        self.ids.append(body_id)
+        self.endInsertRows()
+
+        return
+
+    def removeBodyRow(self, row):
+
+        # The body leaves the registry between begin and end, as views may
+        # still ask for the row's data until the removal has begun
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.registry.remove(self.ids[row])
+        del self.ids[row]
+        self.endRemoveRows()
+
+        return
+
+    def bodyChanged(self, row):
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+        return
 
 
 class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
     def __init__(self, parent=None):
         super(SimMainWindow, self).__init__(parent)
 
-        self.body_list = []
+        self.body_list = BodyRegistry()
         self.star_presets = []
         self.body_presets = []
         self.star = None
         self.camera_focus = 0
+        self.results = None
+        self.live = None
+        self.curves = []
+        self.lines = []
+        self.pyramids = []
+        self.solver = None
+        self.solver_thread = None
+        self.progress = None
+        self.trace_path = None
+        self.cprofile_path = None
 
         self.current_color = None
 
         self.setupUi(self)
+        self.gv_system_view = None
+        self.gv_3d = None
 
         self.loadPresetFiles()
         self.loadStarPreset()
@@ -91,12 +247,12 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
 
         #self.gv_xy.enableAutoRange(axis = self.gv_xy.ViewBox.YAxis, enable=True)
 
-        self.gv_3d.opts['distance'] = (4e11)
+        self.gv_xy.getViewBox().sigRangeChanged.connect(lambda *args: self.refreshCurves())
         self.cmb_preset.setCurrentIndex(1)
 
         self.btn_focus_prv.clicked.connect(lambda: self.setCameraFocus('last'))
         self.btn_focus_next.clicked.connect(lambda: self.setCameraFocus('next'))
-        self.body_list_model = QStandardItemModel(self.lv_bodies)
+        self.body_list_model = BodyListModel(self.body_list, self.lv_bodies)
         self.lv_bodies.setModel(self.body_list_model)
         self.lv_bodies.doubleClicked.connect(self.editBody)
 
@@ -110,62 +266,72 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
         self.btn_reset.clicked.connect(self.reset)
         self.btn_clear.clicked.connect(self.clearPlot)
         self.btn_plot.clicked.connect(self.handlePlot)
+        self.actionOpenRun.triggered.connect(self.openRun)
+        self.actionProfileTrace.toggled.connect(self.chooseTracePath)
+        self.actionProfileCProfile.toggled.connect(self.chooseCProfilePath)
 
         self.loadPreset()
 
 
+    def loadGLViews(self):
+
+        # The OpenGL views, and pyqtgraph.opengl with them, are created once
+        # the window is on screen or as soon as something needs them
+        if self.gv_3d is not None:
+            return
+
+        from pyqtgraph.opengl import GLViewWidget
+
+        self.gv_system_view = GLViewWidget(self.TAB_system_view)
+        self.gv_system_view.setObjectName("gv_system_view")
+        self.verticalLayout_7.addWidget(self.gv_system_view)
+        self.gv_3d = GLViewWidget(self.TAB_3D)
+        self.gv_3d.setObjectName("gv_3d")
+        self.verticalLayout_4.addWidget(self.gv_3d)
+        self.gv_3d.opts['distance'] = (4e11)
+
+        self.loadSystemView()
+
     def launchStarWidget(self):
 
+        import pyqtgraph.opengl as gl
+        from lib.assets.gui.starWidget import Ui_starPresetDialog as starWidget
+        from lib.scripts.meshes import sphereMesh
+
         dialog = QtWidgets.QDialog()
         starDialog = starWidget()
         starDialog.setupUi(dialog)
         dialog.setWindowTitle('Star Browser')
 
-        star_lv_model = QStandardItemModel(starDialog.lv_stars)
+        stars = loadStarData()
+        star_lv_model = CatalogModel(stars, parent=starDialog.lv_stars)
         starDialog.lv_stars.setModel(star_lv_model)
 
-        starDialog.lv_stars.doubleClicked.connect(lambda: updateFields(starDialog.lv_stars.selectionModel().selection().indexes()[0].row()))
-
-        star_list = []
-
-        def loadStars():
-
-            with open('./lib/presets/stars/star_data.csv','r') as f:
-                reader = csv.reader(f, delimiter=',')
-                next(reader)
-                for row in reader:
-                    name = row[0]
-                    alt_name = row[1]
-                    mass = row[2]
-                    radius = row[3]
-                    dist = row[4]
-                    spec_class = row[5]
-                    sol_mass = row[6]
-                    sol_radius = row[7]
-                    temp = row[8]
-                    mag = row[9]
-                    index = row[10]
-                    star = [name, alt_name, mass, radius,dist,spec_class,sol_mass,sol_radius,temp, mag, index]
-                    star_list.append(star)
+        starDialog.lv_stars.doubleClicked.connect(lambda index: updateFields(star_lv_model.catalogRow(index.row())))
+        starDialog.le_search.textChanged.connect(lambda text: star_lv_model.setRows(stars.search(text)))
 
-            for star in star_list:
-                item = QStandardItem(star[0])
-                star_lv_model.appendRow(item)
+        def field(column, index):
 
-            updateFields(index=0)
+            # Blank cells are NaN in numeric columns
+            value = stars[column][index]
+            if isinstance(value, str):
+                return value
+            if value != value:
+                return ''
+            return '%g' % value
 
         def updateFields(index):
 
-            starDialog.le_name.setText(star_list[index][0])
-            starDialog.le_altname.setText(star_list[index][1])
-            starDialog.le_dist.setText(star_list[index][4])
-            starDialog.le_specclass.setText(star_list[index][5])
-            starDialog.le_solmass.setText(star_list[index][6])
-            starDialog.le_mass.setText(star_list[index][2])
-            starDialog.le_radius.setText(star_list[index][3])
-            starDialog.le_radius_2.setText(star_list[index][7])
-            starDialog.le_temp.setText(star_list[index][8])
-            starDialog.le_mag.setText(star_list[index][9])
+            starDialog.le_name.setText(field('name', index))
+            starDialog.le_altname.setText(field('alt_name', index))
+            starDialog.le_dist.setText(field('distance', index))
+            starDialog.le_specclass.setText(field('spectral_class', index))
+            starDialog.le_solmass.setText(field('solar_masses', index))
+            starDialog.le_mass.setText(field('mass', index))
+            starDialog.le_radius.setText(field('radius', index))
+            starDialog.le_radius_2.setText(field('solar_radius', index))
+            starDialog.le_temp.setText(field('temperature', index))
+            starDialog.le_mag.setText(field('magnitude', index))
 
             loadStarModel(index)
 
@@ -175,32 +341,31 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
 
             starDialog.gv_star.clear()
 
-            star_class =  star_list[index][5][0]
+            star_class = field('spectral_class', index)[:1]
 
-            colors = imread('./lib/assets/textures/stars/'+star_class+'.png')
-            colors = colors / 255
-            md = gl.MeshData.sphere(rows=600, cols=800, radius=1)
-            md.setVertexColors(colors=colors)
+            md = sphereMesh(600, 800, star_textures_path+star_class+'.png')
             mi = gl.GLMeshItem(meshdata=md, smooth=True, computeNormals=False, shader='balloon')
             mi.scale(4,4,4)
             starDialog.gv_star.addItem(mi)
 
+        if len(stars) > 0:
+            updateFields(0)
 
-        loadStars()
 
         dialog.show()
         dialog.exec_()
 
     def setCameraFocus(self, direction):
 
+        self.loadGLViews()
         if direction == 'next':
             self.camera_focus += 1
             if self.camera_focus == len(self.body_list):
                 self.camera_focus = 0
-            pos = Vector(self.results[self.camera_focus][-1][0], self.results[self.camera_focus][-1][1], self.results[self.camera_focus][-1][2])
+            pos = Vector(*self.results.final[self.camera_focus])
             print(pos)
             self.gv_3d.opts['center'] = pos
-            self.lbl_body_focus.setText(self.body_list[self.camera_focus].name)
+            self.lbl_body_focus.setText(self.focusBody().name)
             self.gv_3d.update()
             return
         if direction == 'last':
@@ -208,15 +373,18 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
             if self.camera_focus == 0:
                 self.camera_focus = len(self.body_list)-1
             if self.results:
-                pos = Vector(self.results[self.camera_focus][-1][0], self.results[self.camera_focus][-1][1], self.results[self.camera_focus][-1][2])
+                pos = Vector(*self.results.final[self.camera_focus])
             if not self.results:
-                pos = self.body_list[self.camera_focus]
+                pos = self.focusBody()
             print(pos)
             self.gv_3d.opts['center'] = pos
-            self.lbl_body_focus.setText(self.body_list[self.camera_focus].name)
+            self.lbl_body_focus.setText(self.focusBody().name)
             self.gv_3d.update()
             return
 
+    def focusBody(self):
+        return self.body_list.get(self.body_list_model.bodyId(self.camera_focus))
+
     def loadStarPreset(self):
 
         for star in self.star_presets:
@@ -240,8 +408,13 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
         print(self.star.name)
 
     def clearPlot(self):
-        self.gv_3d.clear()
+        if self.gv_3d is not None:
+            self.gv_3d.clear()
         self.gv_xy.clear()
+        self.curves = []
+        self.lines = []
+        self.pyramids = []
+        self.live = None
 
         return
 
@@ -261,36 +434,241 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
 
         print(steps, step_value, report)
 
+        store = None
+        if self.cb_store.isChecked():
+            store = QtWidgets.QFileDialog.getSaveFileName(self, 'Stream Trajectory To', '', 'NumPy Arrays (*.npy)')[0]
+            if not store:
+                return
+
+        method = SOLUTION_METHODS[self.cmb_solmethod.currentText()]
+        options = {}
+        if self.rb_multiprocess.isChecked() == True:
+            method = 'euler'
+            options['multiprocess'] = True
+        if method == 'dopri':
+            options['rtol'] = float(self.le_rtol.text())
+            options['atol'] = float(self.le_atol.text())
+        if method == 'barnes-hut':
+            options['theta'] = float(self.le_theta.text())
+        if self.cb_numba.isChecked() == True:
+            from lib.scripts.simulation import BACKEND_METHODS
+            if method in BACKEND_METHODS:
+                options['backend'] = 'numba'
+        if self.cmb_solvetime.currentText() not in ("Unlimited", ""):
+            options['max_time'] = float(self.cmb_solvetime.currentText())
+
+        # The previous result stays on screen (and can be panned and zoomed)
+        # until the new one arrives
+        self.progress = QtWidgets.QProgressDialog("Computing timesteps..","Cancel",0,steps,self)
+        self.progress.setWindowTitle('Please wait...')
+        self.progress.setModal(False)
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
+        self.progress.setValue(0)
+        self.progress.show()
+
+        # Phase timers cover the solver and the drawing until the run has
+        # been plotted; cProfile covers the solver thread of this run only
+        if self.actionProfilePhases.isChecked() == True or self.trace_path is not None:
+            profiling.enable(trace=self.trace_path is not None)
+        self.solver = SolverWorker(self.star, self.body_list.columns(), method, steps, step_value, report, store, options,
+                                   self.cprofile_path)
+        self.solver_thread = QThread()
+        self.solver.moveToThread(self.solver_thread)
+        self.solver_thread.started.connect(self.solver.run)
+        self.solver.progressed.connect(self.updateProgressDialog)
+        self.solver.published.connect(self.extendPlot)
+        self.solver.finished.connect(self.solverFinished)
+        self.solver.failed.connect(self.solverFailed)
+        # Direct connection: the worker thread is busy, so the flag is set from here
+        self.progress.canceled.connect(self.solver.cancel, Qt.DirectConnection)
+
+        self.solver_span = steps * step_value
+        self.live = None
+        self.statusBar().clearMessage()
+        # Opening a stored run would replace the plot the chunks extend
+        self.btn_plot.setEnabled(False)
+        self.actionOpenRun.setEnabled(False)
+        self.solver_thread.start()
+
+    def stopSolverThread(self):
+
+        self.solver_thread.quit()
+        self.solver_thread.wait()
+        self.solver_thread = None
+        self.solver = None
+        self.progress.close()
+        self.progress = None
+        self.btn_plot.setEnabled(True)
+        self.actionOpenRun.setEnabled(True)
+        if self.cprofile_path is not None:
+            self.actionProfileCProfile.setChecked(False)
+
+    @profiling.phase('progress dialog')
+    def updateProgressDialog(self, value):
+
+        self.progress.setValue(value)
+
+    def chooseTracePath(self, checked):
+
+        self.trace_path = None
+        if checked == True:
+            self.trace_path = QtWidgets.QFileDialog.getSaveFileName(self, 'Save Phase Traces To', '', 'JSON (*.json)')[0] or None
+            if self.trace_path is None:
+                self.actionProfileTrace.setChecked(False)
+
+    def chooseCProfilePath(self, checked):
+
+        self.cprofile_path = None
+        if checked == True:
+            self.cprofile_path = QtWidgets.QFileDialog.getSaveFileName(self, 'Save cProfile Stats To', '', 'Profile Stats (*.prof)')[0] or None
+            if self.cprofile_path is None:
+                self.actionProfileCProfile.setChecked(False)
+
+    def reportProfile(self, prefix=''):
+
+        # Status bar summary of the phase timers after prefix, and the trace
+        # file if one was asked for
+        if profiling.enabled == False:
+            return
+        profiling.disable()
+        summary = profiling.summary()
+        if self.trace_path is not None:
+            profiling.writeTrace(self.trace_path)
+            summary += ' | trace saved to ' + os.path.basename(self.trace_path)
+        self.statusBar().showMessage(prefix + summary)
+
+    def solverFinished(self, results):
+
+        # Stopping the thread unchecks the cProfile toggle, which forgets the path
+        cprofile_path = self.cprofile_path
+        self.stopSolverThread()
+        self.results = results
+
+        # Runs that already streamed chunks only need their last samples
+        # added; anything faster than one publish interval is drawn here
+        if self.live is results:
+            self.extendPlot(results, results.count)
+        else:
+            self.plotResults()
+        self.live = None
+
+        parts = []
+        if results.truncated:
+            parts.append("Run stopped early at t = %.4g days of %.4g days"
+                         % (results.t_reached / SECS_DAY, self.solver_span / SECS_DAY))
+        if 'accepted' in results.meta:
+            parts.append("Accepted steps: %d, rejected steps: %d" % (results.meta['accepted'], results.meta['rejected']))
+        if cprofile_path is not None:
+            parts.append("cProfile stats saved to " + os.path.basename(cprofile_path))
+        message = ' | '.join(parts)
+        if message:
+            self.statusBar().showMessage(message)
+        self.reportProfile(message + ' | ' if message else '')
+
+    def solverFailed(self, message):
+
+        self.stopSolverThread()
+        profiling.disable()
+        QtWidgets.QMessageBox.warning(self, 'Error', 'The solver failed: ' + message, QtWidgets.QMessageBox.Ok)
+
+    def closeEvent(self, event):
+
+        if self.solver is not None:
+            self.solver.cancel()
+            self.solver_thread.quit()
+            self.solver_thread.wait()
+        super(SimMainWindow, self).closeEvent(event)
+
+    def plotResults(self):
+
+        self.plotTrajectory(self.results, self.results.count)
+
+    @profiling.phase('plot setup')
+    def plotTrajectory(self, trajectory, count):
+
+        import pyqtgraph.opengl as gl
+        self.loadGLViews()
+
+        # Runs saved from the command line carry no colors, and may not match
+        # the system loaded in the window, so anything missing is made up
+        # for the bodies in the run
+        names = trajectory.meta.get('names', ['Body %d' % (body + 1) for body in range(len(trajectory))])
+        colors = trajectory.meta.get('colors', [(random(), random(), random(), 1.0) for body in range(len(trajectory))])
+
         self.gv_3d.clear()
         self.gv_xy.clear()
-
         self.gv_xy.setAspectLocked(lock=True, ratio=1)
         self.gv_xy.enableAutoRange(enable=True)
 
-        if self.rb_multiprocess.isChecked() == True:
-            print("true")
-            self.results = Euler(self.star, self.body_list, steps, step_value, report, 1)
+        self.curves = []
+        self.lines = []
+        self.pyramids = []
+        for body in range(0, len(trajectory)):
+            self.pyramids.append(Pyramid(trajectory.positions[:, body]))
+            self.pyramids[body].extend(count)
+            self.curves.append(pyqtg.PlotDataItem(antialiasing=True, name=names[body], connect='finite'))
+            self.lines.append(gl.GLLinePlotItem(color=tuple(colors[body]), antialias=True, mode='line_strip',width=3.0))
+            self.gv_xy.addItem(self.curves[body])
+            self.gv_3d.addItem(self.lines[body])
+        self.gv_xy.addItem(pyqtg.ScatterPlotItem(x=[0], y=[0]))
+
+        self.refreshCurves()
+        self.refreshLines()
+
+    def extendPlot(self, trajectory, count):
+
+        # The first chunk of a run replaces whatever is on screen; later
+        # chunks extend the same line items rather than creating new ones
+        if self.live is not trajectory:
+            self.live = trajectory
+            self.plotTrajectory(trajectory, count)
+            return
+
+        for pyramid in self.pyramids:
+            pyramid.extend(count)
+        self.refreshCurves()
+        self.refreshLines()
+
+    @profiling.phase('plot xy')
+    def refreshCurves(self):
+
+        # Each curve gets only the part of its track in view, at about
+        # XY_POINTS_PER_PIXEL points per pixel, so zooming in refines it.
+        # While auto-ranging the whole track is used so the view can grow
+        view = self.gv_xy.getViewBox()
+        (x0, x1), (y0, y1) = view.viewRange()
+        rect = None if any(view.autoRangeEnabled()) else (x0, x1, y0, y1)
+        budget = XY_POINTS_PER_PIXEL * self.gv_xy.width()
 
+        for curve, pyramid in zip(self.curves, self.pyramids):
+            indices, starts = pyramid.select(budget, rect)
+            xy = gapped(pyramid.positions[indices, :2], starts)
+            curve.setData(x=xy[:,0], y=xy[:,1], connect='finite')
 
-        if self.rb_multiprocess.isChecked() == False:
-            if self.cmb_solmethod.currentText() == "Euler Integration":
-                self.results = Euler(self.star, self.body_list, steps, step_value, report, 0)
+    @profiling.phase('plot 3d')
+    def refreshLines(self):
 
-            if self.cmb_solmethod.currentText() == "Sphere of Influence":
-                self.results = SOI(self.star, self.body_list, int(self.le_n.text()), int(self.le_s.text()), int(self.le_r.text()))
+        for line, pyramid in zip(self.lines, self.pyramids):
+            indices, starts = pyramid.select(GL_LINE_POINTS)
+            line.setData(pos=pyramid.positions[indices])
 
-        for body in range(0, len(self.body_list)):
-            self.gv_xy.addItem(pyqtg.PlotDataItem(x=array(self.results[body][:])[:,0], y=array(self.results[body][:])[:,1], antialiasing=True, name=self.body_list[body].name, ))
-            self.gv_3d.addItem(gl.GLLinePlotItem(pos=array(self.results[body]), color=self.body_list[body].color, antialias=True, mode='line_strip',width=3.0))
-        self.gv_xy.addItem(pyqtg.ScatterPlotItem(x=[0 for x in range(steps)], y=[0 for x in range(steps)]))
+    def openRun(self):
+
+        path = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Stored Run', '', 'NumPy Arrays (*.npy)')[0]
+        if not path:
+            return
+
+        self.results = Trajectory.open(path)
+        self.live = None
+        self.plotResults()
 
 
     def reset(self):
 
         self.body_list.clear()
-        self.body_list_model.clear()
-        self.gv_3d.clear()
-        self.gv_xy.clear()
+        self.body_list_model.reload()
+        self.clearPlot()
 
 
     def removeBody(self):
@@ -300,47 +678,29 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
         except IndexError:
             QtWidgets.QMessageBox.warning(self, 'Error', 'Please choose a body to remove.', QtWidgets.QMessageBox.Ok)
             return
-        body_name = self.body_list_model.item(row, 0).text()
-
-        for body in self.body_list:
-            if body.name == body_name:
-                self.body_list.remove(body)
-        self.body_list_model.removeRow(row)
+        self.body_list_model.removeBodyRow(row)
 
     def loadPresetFiles(self):
 
-        for preset in glob.glob('./lib/presets/systems/*.csv'):
+        for preset in presetFiles(SYSTEM_PRESETS_PATH):
             self.cmb_preset.addItem(os.path.basename(preset))
-        with open(star_preset_path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                self.star_presets.append(Star(row[0], float(row[1]), float(row[2])))
-                self.cb_starPreset.addItem(row[0])
-        with open(body_preset_path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)
-            for row in reader:
-                self.body_presets.append(Body(row[0], float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5])))
-
-    def updateListModel(self):
-
-        self.body_list_model.clear()
-        for body in self.body_list:
-            pix = QPixmap(20, 20)
-            pix.fill(QColor(body.color[0] * 255, body.color[1] * 255, body.color[2] * 255))
-            icon = QIcon(pix)
-            item = QStandardItem(icon, body.name)
-            self.body_list_model.appendRow(item)
+        stars = loadCatalog(STAR_PRESETS_PATH)
+        for i in range(len(stars)):
+            self.star_presets.append(Star(str(stars['name'][i]), float(stars['mass'][i]), float(stars['radius'][i])))
+            self.cb_starPreset.addItem(str(stars['name'][i]))
+        bodies = loadCatalog(BODY_PRESETS_PATH)
+        for i in range(len(bodies)):
+            self.body_presets.append(Body(str(bodies['name'][i]), float(bodies['mass'][i]), float(bodies['radius'][i]),
+                                          float(bodies['orbit_sma'][i]), float(bodies['orbit_mean_velocity'][i]),
+                                          float(bodies['inclination'][i])))
 
     def editBody(self):
 
-        row = self.lv_bodies.selectionModel().selection().indexes()[0].row()
-        body_name = self.body_list_model.item(row, 0).text()
+        from lib.assets.gui.bodyWidget import Ui_bodyForm as bodyWidget
 
-        for body in self.body_list:
-            if body.name == body_name:
-                selected_body = body
+        row = self.lv_bodies.selectionModel().selection().indexes()[0].row()
+        body_id = self.body_list_model.bodyId(row)
+        selected_body = self.body_list.get(body_id)
 
         dialog = QtWidgets.QDialog()
         bodyDialog = bodyWidget()
@@ -361,7 +721,7 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
         bodyDialog.btn_cancel.clicked.connect(lambda: dialog.done(1))
 
         bodyDialog.le_name.setText(str(selected_body.name))
-        bodyDialog.le_radius.setText(str(selected_body.vel))
+        bodyDialog.le_radius.setText(str(selected_body.radius))
         bodyDialog.le_mass.setText(str(selected_body.mass))
         bodyDialog.le_sma.setText(str(selected_body.sma))
         bodyDialog.le_vel.setText(str(selected_body.vel))
@@ -396,14 +756,9 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
             vel = float(bodyDialog.le_vel.text())
             inc = float(bodyDialog.le_inc.text())
 
-            selected_body.name = name
-            selected_body.mass = mass
-            selected_body.radius = radius
-            selected_body.sma = sma
-            selected_body.vel = vel
-            selected_body.inc = inc
-            selected_body.color = self.current_color
-            self.updateListModel()
+            self.body_list.update(body_id, name=name, mass=mass, radius=radius, sma=sma, vel=vel, inc=inc,
+                                  color=self.current_color)
+            self.body_list_model.bodyChanged(row)
             dialog.done(0)
 
         dialog.show()
@@ -411,6 +766,11 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
 
 
     def addBody(self):
+
+        import pyqtgraph.opengl as gl
+        from lib.assets.gui.bodyWidget import Ui_bodyForm as bodyWidget
+        from lib.scripts.meshes import sphereMesh
+
         dialog = QtWidgets.QDialog()
         bodyDialog = bodyWidget()
         bodyDialog.setupUi(dialog)
@@ -457,11 +817,7 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
                     bodyDialog.le_sma.setText(str(preset.sma))
                     bodyDialog.le_inc.setText(str(preset.inc))
 
-            texture = imread('./lib/assets/textures/planets/'+chosen_preset.lower()+'.png')
-            texture = texture / 255
-
-            mesh_data = gl.MeshData.sphere(rows=600, cols=800, radius=1)
-            mesh_data.setVertexColors(colors=texture)
+            mesh_data = sphereMesh(600, 800, planet_textures_path+chosen_preset.lower()+'.png')
             mesh_item = gl.GLMeshItem(meshdata=mesh_data, smooth=True, computeNormals=False, shader='balloon')
             mesh_item.scale(3, 3, 3)
 
@@ -476,11 +832,7 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
             inc = float(bodyDialog.le_inc.text())
             body = Body(name, mass, radius, sma, vel, inc)
             body.color = self.current_color
-            pix = QPixmap(20, 20)
-            pix.fill(QColor(self.current_color[0] * 255, self.current_color[1] * 255, self.current_color[2] * 255))
-            icon = QIcon(pix)
-            self.body_list.append(body)
-            self.body_list_model.appendRow(QStandardItem(icon, body.name))
+            self.body_list_model.appendBody(self.body_list.add(body))
             dialog.done(0)
 
         loadPreset()
@@ -495,35 +847,32 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
 
         self.reset()
 
-        with open(preset, 'r') as f:
-            reader = csv.reader(f, delimiter=',')
-            next(reader)
-            for row in reader:
-                if row[0] == "s":
-                    self.star = Star(row[1],float(row[2]),float(row[3]))
-                if row[0] == "p":
-                    body = Body(row[1],float(row[2]),float(row[3]),float(row[4]),float(row[5]),float(row[6]))
-                    if body.color == None:
-                        body.color = (random(),random(),random(),1.0)
-                    self.body_list.append(body)
-                    print(body.color)
-            for body in self.body_list:
-                pix = QPixmap(20,20)
-                pix.fill(QColor(body.color[0]*255, body.color[1]*255, body.color[2]*255))
-                icon = QIcon(pix)
-                item = QStandardItem(icon, body.name)
-                self.body_list_model.appendRow(item)
-            self.le_starname.setText(str(self.star.name))
-            self.le_starmass.setText(str(self.star.mass))
-            self.le_starradius.setText(str(self.star.radius))
+        self.star, bodies = loadSystem(preset)
+        for body in bodies:
+            if body.color == None:
+                body.color = (random(),random(),random(),1.0)
+            self.body_list.add(body)
+            print(body.color)
+        self.body_list_model.reload()
+        self.le_starname.setText(str(self.star.name))
+        self.le_starmass.setText(str(self.star.mass))
+        self.le_starradius.setText(str(self.star.radius))
+
+        self.loadSystemView()
+
+    def loadSystemView(self):
 
+        # Left for loadGLViews to call when the views do not exist yet
+        if self.gv_system_view is None:
+            return
+
+        from lib.scripts.meshes import LODSphere
+
+        self.gv_system_view.clear()
         for location, body in enumerate(self.body_list):
             try:
-                texture = imread(planet_textures_path+body.name.lower()+'.jpg')
-                texture = texture / 255
-                mesh = gl.MeshData.sphere(rows=300, cols=400, radius=1)
-                mesh.setVertexColors(colors=texture)
-                mesh_item = gl.GLMeshItem(meshdata=mesh, smooth=True, computeNormals=False, shader='balloon')
+                mesh_item = LODSphere(planet_textures_path+body.name.lower()+'.jpg', max_level=(300, 400),
+                                      smooth=True, computeNormals=False, shader='balloon')
                 mesh_item.scale(1,1,1)
                 mesh_item.translate(location*5,0,0)
                 self.gv_system_view.addItem(mesh_item)
@@ -531,23 +880,38 @@ class SimMainWindow(QtWidgets.QMainWindow, mainWindow.Ui_SimMainWindow):
                 print(e)
                 pass
 
-        md = gl.MeshData.sphere(rows=600, cols=800, radius=1)
         try:
-            colors = imread('./lib/assets/textures/stars/G.png')
-            colors = colors / 255
-            md.setVertexColors(colors=colors)
-        except:
-            pass
-        mi = gl.GLMeshItem(meshdata=md, smooth=True, computeNormals=False, shader='balloon')
+            mi = LODSphere(star_textures_path+'G.png', smooth=True, computeNormals=False, shader='balloon')
+        except Exception:
+            mi = LODSphere(smooth=True, computeNormals=False, shader='balloon')
         mi.scale(3, 3, 3)
         self.gv_system_view.addItem(mi)
 
 
 
 def main():
+
+    profile_startup = '--profile-startup' in sys.argv
+    if profile_startup == True:
+        sys.argv.remove('--profile-startup')
+
+    marks = [('imports', time.perf_counter())]
     app = QtWidgets.QApplication(sys.argv)
     win = SimMainWindow()
+    marks.append(('window built', time.perf_counter()))
     win.show()
+    app.processEvents()
+    marks.append(('window shown', time.perf_counter()))
+    win.loadGLViews()
+    marks.append(('OpenGL views', time.perf_counter()))
+
+    if profile_startup == True:
+        previous = STARTED
+        for name, mark in marks:
+            print('%-14s %6.3f s  (+%.3f s)' % (name, mark - STARTED, mark - previous))
+            previous = mark
+        sys.stdout.flush()
+
     app.exec_()
     return
 